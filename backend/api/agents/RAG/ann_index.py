@@ -0,0 +1,177 @@
+import math
+import time
+from dataclasses import dataclass, asdict
+from typing import Literal, Optional, List, Dict
+
+import faiss
+import numpy as np
+
+IndexType = Literal['flat', 'hnsw', 'ivf', 'ivfpq']
+
+
+@dataclass
+class IndexConfig:
+    """
+    Configuration of the FAISS index used by the vectorstore.
+    Approximate indexes pay off only for larger corpora, so below flat_threshold vectors an exact flat index is used.
+    IVF indexes need training, they are built only once there are enough vectors to train the coarse quantizer.
+
+    Attributes:
+        index_type (IndexType): type of the index: 'flat', 'hnsw', 'ivf' or 'ivfpq'. Default: 'flat'
+        flat_threshold (int): number of vectors below which the flat index is used regardless of index_type. Default: 10000
+        nlist (int, optional): number of IVF cells. Default: None (derived from the number of vectors)
+        nprobe (int): number of IVF cells visited during search. Default: 8
+        hnsw_m (int): number of HNSW neighbours per node. Default: 32
+        ef_construction (int): HNSW candidate list size while building. Default: 40
+        ef_search (int): HNSW candidate list size while searching. Default: 64
+        pq_m (int): number of PQ sub-quantizers, must divide the embedding dimension. Default: 8
+        pq_nbits (int): number of bits per PQ sub-quantizer code. Default: 8
+    """
+    index_type: IndexType = 'flat'
+    flat_threshold: int = 10000
+    nlist: Optional[int] = None
+    nprobe: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 40
+    ef_search: int = 64
+    pq_m: int = 8
+    pq_nbits: int = 8
+
+    def __post_init__(self):
+        if self.index_type not in ('flat', 'hnsw', 'ivf', 'ivfpq'):
+            raise ValueError("Index type must be one of 'flat', 'hnsw', 'ivf', 'ivfpq'!")
+
+        if not isinstance(self.flat_threshold, int) or self.flat_threshold < 0:
+            raise ValueError("Flat threshold mustn't be negative!")
+
+        if self.nlist is not None and (not isinstance(self.nlist, int) or self.nlist <= 0):
+            raise ValueError("nlist must be over 0!")
+
+        for name in ('nprobe', 'hnsw_m', 'ef_construction', 'ef_search', 'pq_m', 'pq_nbits'):
+            value = getattr(self, name)
+            if not isinstance(value, int) or value <= 0:
+                raise ValueError(f"{name} must be over 0!")
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def nlist_for(self, count: int) -> int:
+        """Number of IVF cells for the given number of vectors. Each cell gets at least 39 training vectors."""
+        nlist = self.nlist or int(4 * math.sqrt(count))
+        return max(1, min(nlist, count // 39))
+
+    def min_training_size(self, count: int) -> int:
+        size = 39 * self.nlist_for(count)
+        if self.index_type == 'ivfpq':
+            size = max(size, 39 * 2 ** self.pq_nbits)
+        return size
+
+    def resolve(self, count: int) -> IndexType:
+        """Resolves the index type effectively used for the given number of vectors.
+
+        Args:
+            count (int): number of vectors in the index
+
+        Returns:
+            IndexType: 'flat' below the threshold or when there is not enough vectors to train an IVF index,
+                the configured index type otherwise
+        """
+        if self.index_type == 'flat' or count < self.flat_threshold:
+            return 'flat'
+        if self.index_type in ('ivf', 'ivfpq') and count < self.min_training_size(count):
+            return 'flat'
+        return self.index_type
+
+
+def index_kind(index: faiss.Index) -> IndexType:
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVFPQ):
+        return 'ivfpq'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivf'
+    return 'flat'
+
+
+def build_index(config: IndexConfig, vectors: np.ndarray) -> faiss.Index:
+    """Builds an index of the type resolved from the configuration, trains it if needed and adds the vectors.
+
+    Args:
+        config (IndexConfig): index configuration
+        vectors (np.ndarray): float32 matrix of vectors, one per row
+
+    Raises:
+        ValueError: Number of PQ sub-quantizers must divide the embedding dimension!
+
+    Returns:
+        faiss.Index: built index with the search parameters applied
+    """
+    count, dimension = vectors.shape
+    kind = config.resolve(count)
+    if kind == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    elif kind == 'ivf':
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dimension), dimension, config.nlist_for(count))
+    elif kind == 'ivfpq':
+        if dimension % config.pq_m != 0:
+            raise ValueError("Number of PQ sub-quantizers must divide the embedding dimension!")
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dimension), dimension, config.nlist_for(count), config.pq_m, config.pq_nbits)
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig):
+    """Applies the search time parameters (nprobe, efSearch) of the configuration to the index."""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(config.nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.ef_search
+
+
+def recall_latency_report(vectors: np.ndarray, queries: np.ndarray, configs: List[IndexConfig], k: int = 4) -> List[Dict]:
+    """Measures recall@k and search latency of the given index configurations against the exact flat index.
+
+    Args:
+        vectors (np.ndarray): float32 matrix of indexed vectors
+        queries (np.ndarray): float32 matrix of query vectors
+        configs (List[IndexConfig]): configurations to compare
+        k (int, optional): number of retrieved neighbours. Defaults to 4.
+
+    Returns:
+        List[Dict]: one entry per configuration with the effective index type, recall@k,
+            mean and p95 query latency in milliseconds and build time in seconds
+    """
+    baseline = faiss.IndexFlatL2(vectors.shape[1])
+    baseline.add(vectors)
+    _, truth = baseline.search(queries, k)
+
+    report = []
+    for config in configs:
+        start = time.perf_counter()
+        index = build_index(config, vectors)
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            _, found = index.search(query.reshape(1, -1), k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(set(found[0]) & set(expected))
+
+        report.append({
+            **config.as_dict(),
+            "effective_index_type": index_kind(index),
+            "recall_at_k": hits / (len(queries) * k) if len(queries) else 0.0,
+            "mean_latency_ms": float(np.mean(latencies)) if latencies else 0.0,
+            "p95_latency_ms": float(np.percentile(latencies, 95)) if latencies else 0.0,
+            "build_seconds": build_seconds,
+        })
+    return report
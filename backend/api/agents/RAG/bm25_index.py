@@ -0,0 +1,120 @@
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterable, Union
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-/+^]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits the text into lowercase terms.
+    Compound terms such as course codes ('CS-101') or formulas ('x^2') are kept whole and their parts are added as well,
+    so both exact and partial mentions match.
+
+    Args:
+        text (str): text to tokenize
+
+    Returns:
+        List[str]: terms of the text
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = re.findall(r"\w+", token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+@dataclass
+class BM25Index:
+    """
+    Persistent keyword inverted index ranking chunks with Okapi BM25.
+    Chunks are added and removed by their vectorstore ids, so the index follows incremental vectorstore updates.
+
+    Attributes:
+        k1 (float): term frequency saturation. Default: 1.5
+        b (float): document length normalization. Default: 0.75
+        postings (Dict[str, Dict[str, int]]): term frequencies of every term per chunk id
+        doc_lengths (Dict[str, int]): number of terms of every chunk
+    """
+    k1: float = 1.5
+    b: float = 0.75
+    postings: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    doc_lengths: Dict[str, int] = field(default_factory=dict)
+    __doc_terms: Dict[str, List[str]] = field(default_factory=dict, init=False)
+    __total_length: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        for term, docs in self.postings.items():
+            for doc_id in docs:
+                self.__doc_terms.setdefault(doc_id, []).append(term)
+        self.__total_length = sum(self.doc_lengths.values())
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str]):
+        for doc_id, text in zip(doc_ids, texts):
+            if doc_id in self.doc_lengths:
+                self.remove([doc_id])
+            terms = tokenize(text)
+            frequencies = Counter(terms)
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+            self.__doc_terms[doc_id] = list(frequencies)
+            self.doc_lengths[doc_id] = len(terms)
+            self.__total_length += len(terms)
+
+    def remove(self, doc_ids: Iterable[str]):
+        for doc_id in doc_ids:
+            if doc_id not in self.doc_lengths:
+                continue
+            for term in self.__doc_terms.pop(doc_id, []):
+                docs = self.postings.get(term)
+                if docs is None:
+                    continue
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+            self.__total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """Ranks the chunks containing the query terms.
+
+        Args:
+            query (str): searched text
+            k (int, optional): number of returned chunks. Defaults to 4.
+
+        Returns:
+            List[Tuple[str, float]]: chunk ids with their BM25 scores, best first
+        """
+        count = len(self.doc_lengths)
+        if count == 0:
+            return []
+        average_length = self.__total_length / count
+
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / average_length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def save(self, path: Union[str, Path]):
+        with open(path, 'w') as f:
+            json.dump({"k1": self.k1, "b": self.b, "postings": self.postings, "doc_lengths": self.doc_lengths}, f)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "BM25Index":
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(k1=data["k1"], b=data["b"], postings=data["postings"], doc_lengths=data["doc_lengths"])
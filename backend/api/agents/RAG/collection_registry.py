@@ -0,0 +1,105 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from langchain_core.embeddings import Embeddings
+
+from backend.api.agents.RAG.vector_store import VectorStoreProvider
+from backend.config import Config
+from backend.core.validation_methods import validate_collection_id
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CollectionRegistry:
+    """
+    Registry of named document collections (e.g. per course or per user), each with its own documents directory,
+    vectorstore and state. The default collection uses the root directories, every other collection lives in
+    a subdirectory named after it. Vectorstore providers are created lazily on first use and the least recently used
+    ones are evicted once more than max_loaded are loaded. The embedding cache is shared by all collections.
+
+    Attributes:
+        embedding_model (Embeddings): model used for text tokenization and embedding
+        documents_path (Path): root directory of the documents. Default: Path(Config.UPLOAD_DIR)
+        vectorstore_path (Path): root directory of the vectorstores. Default: Path(Config.VECTOR_DB_DIR)
+        max_loaded (int): maximum number of providers kept in memory. Default: Config.MAX_LOADED_COLLECTIONS
+        provider_kwargs (Dict[str, Any]): additional arguments passed to every VectorStoreProvider
+    """
+    embedding_model: Embeddings
+    documents_path: Union[str, Path] = Path(Config.UPLOAD_DIR)
+    vectorstore_path: Union[str, Path] = Path(Config.VECTOR_DB_DIR)
+    max_loaded: int = Config.MAX_LOADED_COLLECTIONS
+    provider_kwargs: Dict[str, Any] = field(default_factory=dict)
+    __providers: "OrderedDict[str, VectorStoreProvider]" = field(default_factory=OrderedDict, init=False)
+    __lock: Any = field(default_factory=threading.RLock, init=False)
+
+    def __post_init__(self):
+        self.documents_path = Path(self.documents_path)
+        self.vectorstore_path = Path(self.vectorstore_path)
+
+        if not isinstance(self.max_loaded, int) or self.max_loaded <= 0:
+            raise ValueError("Number of loaded collections must be over 0!")
+
+    def __validate(self, collection: str):
+        if not validate_collection_id(collection):
+            raise ValueError("Collection id must consist of 1 to 64 letters, digits, '_' or '-'!")
+
+    def documents_path_for(self, collection: str) -> Path:
+        self.__validate(collection)
+        if collection == Config.DEFAULT_COLLECTION:
+            return self.documents_path
+        return self.documents_path / collection
+
+    def vectorstore_path_for(self, collection: str) -> Path:
+        self.__validate(collection)
+        if collection == Config.DEFAULT_COLLECTION:
+            return self.vectorstore_path
+        return self.vectorstore_path / collection
+
+    def exists(self, collection: str) -> bool:
+        """Checks whether the collection was created, i.e. it is the default one or has documents or a vectorstore.
+        Unlike get, it never creates the collection's directories nor loads its provider."""
+        self.__validate(collection)
+        if collection == Config.DEFAULT_COLLECTION or collection in self.__providers:
+            return True
+        return self.documents_path_for(collection).is_dir() or self.vectorstore_path_for(collection).is_dir()
+
+    @property
+    def loaded(self) -> List[str]:
+        return list(self.__providers)
+
+    def get(self, collection: str = Config.DEFAULT_COLLECTION) -> VectorStoreProvider:
+        """Returns the vectorstore provider of the collection, creating it if it isn't loaded.
+
+        Args:
+            collection (str, optional): collection id. Defaults to Config.DEFAULT_COLLECTION.
+
+        Raises:
+            ValueError: Collection id must consist of 1 to 64 letters, digits, '_' or '-'!
+
+        Returns:
+            VectorStoreProvider: provider of the collection
+        """
+        self.__validate(collection)
+        with self.__lock:
+            provider = self.__providers.get(collection)
+            if provider is not None:
+                self.__providers.move_to_end(collection)
+                return provider
+
+            logger.info(f"Loading collection: {collection}")
+            provider = VectorStoreProvider(
+                self.embedding_model,
+                documents_path=self.documents_path_for(collection),
+                vectorstore_path=self.vectorstore_path_for(collection),
+                embedding_cache_path=self.vectorstore_path / "embedding_cache.sqlite",
+                **self.provider_kwargs
+            )
+            self.__providers[collection] = provider
+            while len(self.__providers) > self.max_loaded:
+                evicted, _ = self.__providers.popitem(last=False)
+                logger.info(f"Evicting collection: {evicted}")
+            return provider
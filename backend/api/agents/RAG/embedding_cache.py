@@ -0,0 +1,134 @@
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, ClassVar
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def embedding_namespace(embedding_model: Embeddings) -> str:
+    """Builds the identifier of the vectors produced by the given embedding model.
+    Vectors of different models, normalization settings or runtimes (e.g. a quantized ONNX export drifts from
+    the PyTorch model) must never be mixed, so all of them are part of the cache key.
+
+    Args:
+        embedding_model (Embeddings): embedding model
+
+    Returns:
+        str: identifier of the embedding model, its normalization flag and its non-default runtime
+    """
+    model_name = getattr(embedding_model, 'model_name', None) or getattr(embedding_model, 'model', None) \
+        or type(embedding_model).__name__
+    encode_kwargs = getattr(embedding_model, 'encode_kwargs', None) or {}
+    normalize = bool(encode_kwargs.get('normalize_embeddings', False))
+    namespace = f"{model_name}|normalize={normalize}"
+
+    model_kwargs = getattr(embedding_model, 'model_kwargs', None) or {}
+    backend = model_kwargs.get('backend', 'torch')
+    if backend != 'torch':
+        file_name = (model_kwargs.get('model_kwargs') or {}).get('file_name', 'default')
+        namespace += f"|backend={backend}|file={file_name}"
+    return namespace
+
+
+@dataclass
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that stores document vectors in a persistent SQLite cache addressed by the chunk text content.
+    Only the texts missing from the cache are passed to the wrapped embedding model. Query embeddings are not cached.
+
+    Attributes:
+        embedding_model (Embeddings): wrapped embedding model
+        cache_path (Path): path to the SQLite cache file. Default: Path("storage/vector_db/embedding_cache.sqlite")
+        namespace (str, optional): identifier of the produced vectors. Default: model name and normalization flag
+        hits (int): number of texts found in the cache since the last stats reset
+        misses (int): number of texts embedded since the last stats reset
+    """
+    embedding_model: Embeddings
+    cache_path: Path = Path("storage/vector_db/embedding_cache.sqlite")
+    namespace: Optional[str] = None
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    __lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    __LOOKUP_BATCH: ClassVar[int] = 500
+
+    def __post_init__(self):
+        if not isinstance(self.cache_path, Path):
+            self.cache_path = Path(self.cache_path)
+        if self.namespace is None:
+            self.namespace = embedding_namespace(self.embedding_model)
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.__connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "namespace TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, text_hash))"
+            )
+
+    def __connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.cache_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def __text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def __lookup(self, conn: sqlite3.Connection, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for start in range(0, len(hashes), self.__LOOKUP_BATCH):
+            batch = hashes[start:start + self.__LOOKUP_BATCH]
+            rows = conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE namespace = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                [self.namespace, *batch]
+            )
+            for text_hash, vector in rows:
+                found[text_hash] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds the given texts, reusing vectors already present in the cache.
+
+        Args:
+            texts (List[str]): texts to embed
+
+        Returns:
+            List[List[float]]: vectors in the same order as the given texts
+        """
+        hashes = [self.__text_hash(text) for text in texts]
+        # The lock guards only the database access, other callers aren't blocked while the model embeds.
+        with self.__lock, closing(self.__connect()) as conn, conn:
+            vectors = self.__lookup(conn, list(set(hashes)))
+
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+
+        if missing:
+            embedded = self.embedding_model.embed_documents(list(missing.values()))
+            with self.__lock, closing(self.__connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (namespace, text_hash, vector) VALUES (?, ?, ?)",
+                    [(self.namespace, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                     for text_hash, vector in zip(missing.keys(), embedded)]
+                )
+            vectors.update(zip(missing.keys(), embedded))
+
+        with self.__lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return [list(vectors[text_hash]) for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding_model.embed_query(text)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
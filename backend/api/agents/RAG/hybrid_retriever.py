@@ -0,0 +1,54 @@
+from typing import List, Dict
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from backend.api.agents.RAG.bm25_index import BM25Index
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing dense similarity search with BM25 keyword search using weighted reciprocal rank fusion.
+    Keyword search catches exact course codes, formulas and names that embeddings tend to miss.
+
+    Attributes:
+        vectorstore (FAISS): vectorstore used for the dense search
+        bm25 (BM25Index): keyword index over the same chunks
+        k (int): number of returned documents. Default: 4
+        fetch_k (int): number of candidates taken from each ranking. Default: 20
+        dense_weight (float): weight of the dense ranking. Default: 1.0
+        keyword_weight (float): weight of the keyword ranking. Default: 1.0
+        rrf_k (int): reciprocal rank fusion constant. Default: 60
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: FAISS
+    bm25: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    dense_weight: float = 1.0
+    keyword_weight: float = 1.0
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        scores: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+
+        dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        for rank, document in enumerate(dense):
+            documents[document.id] = document
+            scores[document.id] = scores.get(document.id, 0.0) + self.dense_weight / (self.rrf_k + rank + 1)
+
+        for rank, (doc_id, _) in enumerate(self.bm25.search(query, self.fetch_k)):
+            if doc_id not in documents:
+                document = self.vectorstore.docstore.search(doc_id)
+                if not isinstance(document, Document):
+                    continue
+                documents[doc_id] = document
+            scores[doc_id] = scores.get(doc_id, 0.0) + self.keyword_weight / (self.rrf_k + rank + 1)
+
+        ranking = sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
+        return [documents[doc_id] for doc_id in ranking[:self.k]]
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from backend.core.lru_cache import LRUCache
+
+
+@dataclass
+class QueryCachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper keeping the embeddings of recent queries in an in-memory LRU cache.
+    Document embeddings are passed through to the wrapped model.
+
+    Attributes:
+        embedding_model (Embeddings): wrapped embedding model
+        cache (LRUCache): cache of query embeddings
+    """
+    embedding_model: Embeddings
+    cache: LRUCache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding_model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        embedding = self.cache.get(text)
+        if embedding is None:
+            embedding = self.embedding_model.embed_query(text)
+            self.cache.put(text, embedding)
+        return embedding
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Retriever wrapper keeping the top-k results of recent queries in an in-memory LRU cache.
+    Results are keyed by the index version, so they are never served for a different index.
+
+    Attributes:
+        retriever (BaseRetriever): wrapped retriever
+        cache (LRUCache): cache of retrieval results
+        index_version (str): version of the index searched by the wrapped retriever
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    cache: LRUCache
+    index_version: str
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        key = (self.index_version, query)
+        documents = self.cache.get(key)
+        if documents is None:
+            documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            self.cache.put(key, documents)
+        return list(documents)
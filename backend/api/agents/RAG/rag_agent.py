@@ -1,42 +1,178 @@
+import asyncio
+import logging
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Union, Optional, ClassVar
+from typing import Union, Optional, ClassVar, List, Dict, Literal
 
+from langchain_core.documents.base import Document
 from langchain_core.embeddings import Embeddings
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
 from langgraph.prebuilt import create_react_agent
 
+from backend.api.agents.RAG.collection_registry import CollectionRegistry
 from backend.api.agents.RAG.vector_store import VectorStoreProvider
+from backend.config import Config
 from backend.core.agents.base_agent import BaseAgent
+from backend.core.llm_usage import LLMUsageTracker, UsageStats
+from backend.core.validation_methods import validate_string
+
+logger = logging.getLogger(__name__)
+
+RAGMode = Literal["agent", "direct"]
 
 
 @dataclass
 class RAGAgent(BaseAgent):
+    """
+    Agent answering questions from the documents of a collection.
+    In 'agent' mode the LLM decides when to call the 'document_lookup' tool, in 'direct' mode the retriever
+    is always run first and the answer is generated with a single LLM call.
+
+    Attributes:
+        embedding_model (Embeddings): model used for text tokenization and embedding
+        documents_path (Union[str, Path], optional): root directory of the documents. Default: None
+        collections (CollectionRegistry, optional): registry of document collections. Default: None
+        mode (RAGMode): 'agent' or 'direct'. Default: Config.RAG_MODE
+    """
     __DEFAULT_PROMPT: ClassVar[str] = """
     You are an agent responsible for providing detailed information for the given question.
     Use available tool 'document_lookup' to retrieve relevant question related context.
     If you don't know the answer respond 'No context available for this question.'
     """
-    
+
+    __DIRECT_PROMPT: ClassVar[str] = """
+    You are an agent responsible for providing detailed information for the given question.
+    Answer using only the provided context retrieved from the user's documents.
+    If the context doesn't answer the question respond 'No context available for this question.'
+    """
+
+    __NO_CONTEXT: ClassVar[str] = "No context available for this question."
+
     embedding_model: Embeddings
     documents_path: Optional[Union[str, Path]] = None
-    vector_store: VectorStoreProvider = field(init=False)
-    
+    collections: Optional[CollectionRegistry] = None
+    mode: RAGMode = Config.RAG_MODE
+    __stats: Dict[str, UsageStats] = field(default_factory=lambda: {"agent": UsageStats(), "direct": UsageStats()}, init=False)
+
     def __post_init__(self):
-        self.vector_store = VectorStoreProvider(self.embedding_model, documents_path=self.documents_path) if self.documents_path else VectorStoreProvider(self.embedding_model)
+        if self.mode not in ("agent", "direct"):
+            raise ValueError("RAG mode must be 'agent' or 'direct'!")
+
+        if self.collections is None:
+            self.collections = CollectionRegistry(self.embedding_model, documents_path=self.documents_path) if self.documents_path else CollectionRegistry(self.embedding_model)
         if not hasattr(self, 'prompt') or self.prompt is None:
             self.prompt = self.__DEFAULT_PROMPT
-            
+
         super().__post_init__()
-    
+
+    @property
+    def vector_store(self) -> VectorStoreProvider:
+        return self.collections.get(Config.DEFAULT_COLLECTION)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Average latency, number of LLM calls and tokens per invocation in each mode."""
+        return {mode: stats.as_dict() for mode, stats in self.__stats.items()}
+
+    def relevance(self, question: str, collection: str = Config.DEFAULT_COLLECTION) -> Optional[float]:
+        """Highest cosine similarity between the question and the documents retrieved from the collection,
+        None if nothing was retrieved."""
+        return self.collections.get(collection).relevance(question)
+
+    def __retrieve(self, question: str, collection: str) -> Optional[List[Document]]:
+        retriever = self.collections.get(collection).retriever
+        if retriever is None:
+            return None
+        return retriever.invoke(question)
+
+    def __direct_messages(self, question: str, documents: List[Document]) -> List[tuple]:
+        context = "\n\n".join(f"[{i}] {document.page_content}" for i, document in enumerate(documents, 1))
+        return [("system", self.__DIRECT_PROMPT), ("user", f"QUESTION: {question}\nCONTEXT:\n{context}")]
+
+    def __record(self, mode: str, start: float, tracker: LLMUsageTracker):
+        latency = time.perf_counter() - start
+        self.__stats[mode].record(latency, tracker)
+        logger.info(f"RAG {mode} mode: {latency:.2f}s, {tracker.llm_calls} LLM call(s), "
+                    f"{tracker.input_tokens} input and {tracker.output_tokens} output token(s).")
+
+    def invoke(self, question: str, collection: str = Config.DEFAULT_COLLECTION) -> Optional[str | List[str | Dict]]:
+        """Invoke the agent with a question searching the documents of the given collection.
+
+        Args:
+            question (str): The question to ask the agent.
+            collection (str, optional): Id of the searched collection. Defaults to Config.DEFAULT_COLLECTION.
+
+        Raises:
+            ValueError: If the question is not a valid nonempty string.
+
+        Returns:
+            Optional[str | List[str | Dict]]: The response from the agent.
+        """
+        if not validate_string(question):
+            raise ValueError("Question must be a valid nonempty string!")
+
+        tracker = LLMUsageTracker()
+        start = time.perf_counter()
+        if self.mode == "direct":
+            documents = self.__retrieve(question, collection)
+            if documents:
+                response = self.llm.invoke(self.__direct_messages(question, documents), config={"callbacks": [tracker]}).content
+            else:
+                response = self.__NO_CONTEXT
+        else:
+            response = super().invoke(question, config={"configurable": {"collection": collection}, "callbacks": [tracker]})
+        self.__record(self.mode, start, tracker)
+        return response
+
+    async def ainvoke(self, question: str, collection: str = Config.DEFAULT_COLLECTION) -> Optional[str | List[str | Dict]]:
+        """Asynchronously invoke the agent with a question searching the documents of the given collection.
+
+        Args:
+            question (str): The question to ask the agent.
+            collection (str, optional): Id of the searched collection. Defaults to Config.DEFAULT_COLLECTION.
+
+        Raises:
+            ValueError: If the question is not a valid nonempty string.
+
+        Returns:
+            Optional[str | List[str | Dict]]: The response from the agent.
+        """
+        if not validate_string(question):
+            raise ValueError("Question must be a valid nonempty string!")
+
+        tracker = LLMUsageTracker()
+        start = time.perf_counter()
+        if self.mode == "direct":
+            documents = await asyncio.to_thread(self.__retrieve, question, collection)
+            if documents:
+                message = await self.llm.ainvoke(self.__direct_messages(question, documents), config={"callbacks": [tracker]})
+                response = message.content
+            else:
+                response = self.__NO_CONTEXT
+        else:
+            response = await super().ainvoke(question, config={"configurable": {"collection": collection}, "callbacks": [tracker]})
+        self.__record(self.mode, start, tracker)
+        return response
+
     def _create_agent(self):
-        @tool
-        def document_lookup(question: str):
+        def document_lookup(question: str, config: RunnableConfig):
             """Retrieves relevant documents/information based on the given question.
 
             Args:
                 question (str): given question
             """
-            return self.vector_store.retriever.invoke(question)
-        
-        return create_react_agent(self.llm, tools=[document_lookup], prompt=self.prompt)
\ No newline at end of file
+            collection = config.get("configurable", {}).get("collection", Config.DEFAULT_COLLECTION)
+            documents = self.__retrieve(question, collection)
+            if documents is None:
+                return "No documents have been indexed for this collection yet."
+            return documents
+
+        async def adocument_lookup(question: str, config: RunnableConfig):
+            # Embedding the query and searching the index are CPU-bound, so they run in a worker thread
+            # instead of blocking the event loop.
+            return await asyncio.to_thread(document_lookup, question, config)
+
+        lookup_tool = StructuredTool.from_function(func=document_lookup, coroutine=adocument_lookup)
+        return create_react_agent(self.llm, tools=[lookup_tool], prompt=self.prompt)
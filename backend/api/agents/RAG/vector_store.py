@@ -1,34 +1,119 @@
+import hashlib
 import json
-import pickle
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
-from itertools import chain
 from pathlib import Path
-from typing import List, Optional, Set, Dict, Type
+from typing import List, Optional, Set, Dict, Type, Iterator, Tuple, Callable, Any
 import logging
 
+import faiss
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, BSHTMLLoader, UnstructuredMarkdownLoader, \
     UnstructuredWordDocumentLoader, UnstructuredPowerPointLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents.base import Document
 from langchain_core.embeddings import Embeddings
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
 
+from backend.api.agents.RAG.ann_index import IndexConfig, index_kind, build_index, apply_search_params, \
+    recall_latency_report
+from backend.api.agents.RAG.bm25_index import BM25Index
+from backend.api.agents.RAG.embedding_cache import CachedEmbeddings, embedding_namespace
+from backend.api.agents.RAG.hybrid_retriever import HybridRetriever
+from backend.api.agents.RAG.query_cache import QueryCachedEmbeddings, CachedRetriever
+from backend.config import Config
+from backend.core.lru_cache import LRUCache
 from backend.core.validation_methods import validate_string
 
 logger = logging.getLogger(__name__)
 
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """Computes the SHA-256 hash of the file content.
+
+    Args:
+        path (Path): path to the file
+        block_size (int, optional): number of bytes read at once. Defaults to 1 MiB.
+
+    Returns:
+        str: hexadecimal digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_and_split_document(path: Path, loader: Type, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Loads the document with the given loader and splits it into chunks.
+    Defined at module level so that it can be executed in worker processes.
+
+    Args:
+        path (Path): path to the document
+        loader (Type): document loader class
+        chunk_size (int): size of document chunk
+        chunk_overlap (int): number of chunk overlaps
+
+    Raises:
+        FileNotFoundError: Invalid document file
+
+    Returns:
+        List[Document]: chunks of the document
+    """
+    if not (path.exists() and path.is_file() and path.stat().st_size > 0):
+        raise FileNotFoundError(f"Invalid document file: {path}")
+
+    documents = loader(str(path)).load()
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len
+    )
+
+    return text_splitter.split_documents(documents)
+
+
 @dataclass
 class VectorStoreProvider:
     """
-    Class responsible for providing retriever for vectorstore. It automatically detects changes to documents and rebuilds itself.
-    Supports only TXT and PDF files for documents.
+    Class responsible for providing retriever for vectorstore. It automatically detects changes to documents and
+    updates itself. Only the vectors of files that were added, removed or whose content changed are touched,
+    the chunks belonging to every file are tracked in a manifest stored next to the state file.
+    Supports PDF, TXT, HTML, MD, DOCX and PPTX files for documents.
 
     Attributes:
         embedding_model (Embeddings): model used for text tokenization and embedding
         chunk_size (int): size of document chunk. Default: 1000
         chunk_overlap (int): number of chunk overlaps. Default: 200
         documents_path (Path): Path to documents directory. Default: Path("documents").
+        embedding_cache (bool): whether chunk vectors are cached on disk by their text content. Default: True
+        embedding_cache_path (Path, optional): path to the embedding cache file, may be shared by several vectorstores.
+            Default: None (embedding_cache.sqlite in the vectorstore directory)
+        workers (int): number of processes used to load and split documents. Default: Config.INGEST_WORKERS
+        batch_size (int): number of chunks embedded and added to the index at once. Default: Config.INGEST_BATCH_SIZE
+        batch_max_mb (int): maximum size of chunk text buffered in the pending embedding batch.
+            Default: Config.INGEST_BATCH_MAX_MB
+        index_config (IndexConfig): type and parameters of the FAISS index. Default: Config.VECTOR_INDEX_TYPE
+            with flat index below Config.VECTOR_INDEX_FLAT_THRESHOLD vectors. Removing or changing a document rebuilds
+            an approximate index from the remaining vectors; an IVF-PQ index re-embeds the whole remaining corpus
+            for it, which without embedding_cache means calling the embedding model for every chunk
+        hybrid (bool): whether dense search results are fused with BM25 keyword search results. Default: Config.HYBRID_SEARCH
+        query_cache_size (int): number of query embeddings and retrieval results kept in memory, 0 disables caching.
+            Default: Config.QUERY_CACHE_SIZE
+        query_cache_ttl (float, optional): number of seconds after which cached queries expire. Default: Config.QUERY_CACHE_TTL
+        auto_refresh (bool): whether the retriever updates the vectorstore when the documents changed. When disabled
+            updates must be run with refresh, e.g. by a background ingestion job. Default: True
     """
     embedding_model: Embeddings
     k: int = 4
@@ -36,7 +121,31 @@ class VectorStoreProvider:
     chunk_overlap: int = 200
     documents_path: Path = Path("storage/uploads")
     vectorstore_path: Path = Path("storage/vector_db")
-    __retriever: Optional[VectorStoreRetriever] = field(default=None, init=False)
+    embedding_cache: bool = True
+    embedding_cache_path: Optional[Path] = None
+    workers: int = Config.INGEST_WORKERS
+    batch_size: int = Config.INGEST_BATCH_SIZE
+    batch_max_mb: int = Config.INGEST_BATCH_MAX_MB
+    index_config: IndexConfig = field(default_factory=lambda: IndexConfig(
+        index_type=Config.VECTOR_INDEX_TYPE,
+        flat_threshold=Config.VECTOR_INDEX_FLAT_THRESHOLD
+    ))
+    hybrid: bool = Config.HYBRID_SEARCH
+    query_cache_size: int = Config.QUERY_CACHE_SIZE
+    query_cache_ttl: Optional[float] = Config.QUERY_CACHE_TTL
+    auto_refresh: bool = True
+    build_stats: Dict[str, float] = field(default_factory=dict, init=False)
+    __embeddings: Embeddings = field(init=False)
+    __embedding_cache: Optional[CachedEmbeddings] = field(default=None, init=False)
+    __retriever: Optional[BaseRetriever] = field(default=None, init=False)
+    __vectorstore: Optional[FAISS] = field(default=None, init=False)
+    __bm25: BM25Index = field(default_factory=BM25Index, init=False)
+    __update_lock: Any = field(default_factory=threading.Lock, init=False)
+    __state_mtime: Optional[float] = field(default=None, init=False)
+    __index_version: str = field(default="", init=False)
+    __query_embeddings_cache: Optional[LRUCache] = field(default=None, init=False)
+    __results_cache: Optional[LRUCache] = field(default=None, init=False)
+    __manifest: Optional[dict] = field(default=None, init=False)
     __cached_documents: Dict[Path, float] = field(default_factory=dict, init=False)
     __loaders: Dict[str, Type] = field(init=False, default_factory=lambda: {
         ".pdf": PyPDFLoader,
@@ -57,6 +166,21 @@ class VectorStoreProvider:
         if not isinstance(self.chunk_overlap, int) or self.chunk_overlap >= self.chunk_size:
             raise ValueError("Chunk overlap mustn't be bigger or equal the size of chunk!")
 
+        if not isinstance(self.workers, int) or self.workers <= 0:
+            raise ValueError("Number of workers must be over 0!")
+
+        if not isinstance(self.batch_size, int) or self.batch_size <= 0:
+            raise ValueError("Batch size must be over 0!")
+
+        if not isinstance(self.batch_max_mb, int) or self.batch_max_mb <= 0:
+            raise ValueError("Batch size limit must be over 0!")
+
+        if not isinstance(self.index_config, IndexConfig):
+            raise ValueError("Index config must be an IndexConfig object!")
+
+        if not isinstance(self.query_cache_size, int) or self.query_cache_size < 0:
+            raise ValueError("Query cache size mustn't be negative!")
+
         if not isinstance(self.documents_path, Path):
             if not validate_string(self.documents_path):
                 raise ValueError("Path to documents must be a Path object!")
@@ -69,63 +193,133 @@ class VectorStoreProvider:
             else:
                 self.vectorstore_path = Path(self.vectorstore_path)
 
-        self.documents_path.mkdir(exist_ok=True)
-        self.vectorstore_path.mkdir(exist_ok=True)
-        self.__documents_changed_check()
+        self.documents_path.mkdir(parents=True, exist_ok=True)
+        self.vectorstore_path.mkdir(parents=True, exist_ok=True)
+        if self.embedding_cache:
+            cache_path = self.embedding_cache_path or self.vectorstore_path / "embedding_cache.sqlite"
+            self.__embedding_cache = CachedEmbeddings(self.embedding_model, cache_path)
+            self.__embeddings = self.__embedding_cache
+        else:
+            self.__embeddings = self.embedding_model
+        if self.query_cache_size:
+            self.__query_embeddings_cache = LRUCache(self.query_cache_size, self.query_cache_ttl)
+            self.__results_cache = LRUCache(self.query_cache_size, self.query_cache_ttl)
+            self.__embeddings = QueryCachedEmbeddings(self.__embeddings, self.__query_embeddings_cache)
+        self.__cached_documents = self.__current_documents()
 
     @property
     def documents_files(self) -> Set[Path]:
-        return set(self.documents_path.glob("*.*"))
+        return {path for path in self.documents_path.glob("*.*") if path.is_file() and path.suffix in self.__loaders}
 
-    def __documents_changed_check(self) -> bool:
-        current = {path: path.stat().st_mtime for path in self.documents_files}
-        if current != self.__cached_documents:
-            self.__cached_documents = current
-            self.__retriever = None
-            return True
-        return False
+    def __current_documents(self) -> Dict[Path, float]:
+        return {path: path.stat().st_mtime for path in self.documents_files}
+
+    def __documents_changed(self) -> bool:
+        """Compares the documents with the ones the retriever was built from. The retriever is left in place,
+        it keeps serving queries until an update swaps it under the update lock."""
+        return self.__current_documents() != self.__cached_documents
+
+    def __load_and_split_documents(self, paths: List[Path]) -> Iterator[Tuple[Path, Optional[List[Document]]]]:
+        """Loads and splits the given documents, in a process pool when more than one worker is configured.
+        A document that fails to load is logged and yielded with None instead of aborting the whole build.
 
-    def __validate_document(self, path: Path) -> bool:
-        return path.exists() and path.is_file() and path.stat().st_size > 0
+        Args:
+            paths (List[Path]): paths to the documents
 
-    def __load_and_split_document(self, path: Path) -> List[Document]:
-        if not self.__validate_document(path):
-            raise FileNotFoundError(f"Invalid document file: {path}")
+        Yields:
+            Tuple[Path, Optional[List[Document]]]: path and chunks of each document, in the order of the given paths
+        """
+        def args(path: Path):
+            return path, self.__loaders[path.suffix], self.chunk_size, self.chunk_overlap
 
-        suffix = path.suffix
-        loader = self.__loaders.get(path.suffix)
-        if not loader:
-            raise ValueError(f"Unsupported file type: {suffix}")
+        if self.workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                try:
+                    yield path, load_and_split_document(*args(path))
+                except Exception:
+                    logger.exception(f"Failed to load document: {path.name}")
+                    yield path, None
+            return
 
-        documents = loader(str(path)).load()
+        # Only a bounded window of documents is in flight, so parsed documents don't pile up in memory
+        # while the consumer is embedding.
+        workers = min(self.workers, len(paths))
+        window = 2 * workers
+        pending: deque = deque()
+        remaining = iter(paths)
+        # Workers are spawned rather than forked: the parent runs the event loop, ingestion threads and sqlite
+        # connections, and a forked child may inherit a held lock or an open database handle.
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len
-        )
+        def restart():
+            """Replaces a pool broken by a crashed worker process and resubmits the documents in flight."""
+            nonlocal executor
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            for position, (path, future) in enumerate(pending):
+                if not future.done() or future.exception() is not None:
+                    pending[position] = (path, executor.submit(load_and_split_document, *args(path)))
 
-        return text_splitter.split_documents(documents)
+        def submit(path: Path):
+            try:
+                pending.append((path, executor.submit(load_and_split_document, *args(path))))
+            except BrokenProcessPool:
+                restart()
+                pending.append((path, executor.submit(load_and_split_document, *args(path))))
+
+        def load_isolated(path: Path) -> List[Document]:
+            """Loads the document in its own process, so a crash can be attributed to it."""
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as isolated:
+                return isolated.submit(load_and_split_document, *args(path)).result()
+
+        try:
+            for path in remaining:
+                submit(path)
+                if len(pending) >= window:
+                    break
+            while pending:
+                path, future = pending.popleft()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    submit(next_path)
+                try:
+                    chunks = future.result()
+                except BrokenProcessPool:
+                    # Any document in flight may have crashed the pool, this one is retried alone to find out.
+                    logger.warning(f"Document worker process crashed, retrying in isolation: {path.name}")
+                    restart()
+                    try:
+                        chunks = load_isolated(path)
+                    except Exception:
+                        logger.exception(f"Failed to load document: {path.name}")
+                        chunks = None
+                except Exception:
+                    logger.exception(f"Failed to load document: {path.name}")
+                    chunks = None
+                yield path, chunks
+        finally:
+            executor.shutdown(cancel_futures=True)
 
-    def __load_and_split_documents(self) -> List[Document]:
-        if self.__documents_changed_check() or not hasattr(self, '__chunks'):
-            if len(self.documents_files) == 0:
-                raise ValueError("There must be at least one document in documents folder!")
-            self.__chunks = list(chain.from_iterable(self.__load_and_split_document(doc) for doc in self.__cached_documents.keys() if doc.name != '.gitignore'))
-        return self.__chunks
-    
     def __get_state_file(self) -> Path:
         return self.vectorstore_path / "state.json"
 
     def __save_state(self):
+        self.__set_index_version(uuid.uuid4().hex)
         state = {
             "documents": {str(path): mtime for path, mtime in self.__cached_documents.items()},
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap,
-            "k": self.k
+            "k": self.k,
+            "index": self.index_config.as_dict(),
+            "embeddings": embedding_namespace(self.embedding_model),
+            "version": self.__index_version
         }
-        with open(self.__get_state_file(), 'w') as f:
-            json.dump(state, f)
+        def write_state(path: Path):
+            with open(path, 'w') as f:
+                json.dump(state, f)
+
+        self.__write_atomic(self.__get_state_file(), write_state)
 
     def __load_state(self) -> Optional[dict]:
         state_file = self.__get_state_file()
@@ -139,39 +333,492 @@ class VectorStoreProvider:
             "documents": {str(path): path.stat().st_mtime for path in self.documents_files},
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap,
-            "k": self.k
+            "k": self.k,
+            "index": self.index_config.as_dict(),
+            "embeddings": embedding_namespace(self.embedding_model)
         }
         saved_state = self.__load_state()
+        if saved_state is not None:
+            saved_state.pop("version", None)
+            # States saved before the embedding model was recorded were built with the current one.
+            saved_state.setdefault("embeddings", current_state["embeddings"])
         return saved_state != current_state
 
-    def __get_vectorstore_file(self) -> Path:
-        return self.vectorstore_path / "vectorstore.pkl"
+    def __set_index_version(self, version: str):
+        """Sets the version of the index, invalidating cached queries when it changes."""
+        if version != self.__index_version:
+            self.__index_version = version
+            for cache in (self.__query_embeddings_cache, self.__results_cache):
+                if cache is not None:
+                    cache.clear()
+
+    @property
+    def index_version(self) -> str:
+        """Version of the index, changes on every update of the vectorstore. Without auto_refresh a vectorstore saved
+        by another process is picked up first, like the retriever does."""
+        if not self.auto_refresh:
+            self.__reload_saved_vectorstore()
+        return self.__index_version
+
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit-rate statistics of the query embeddings and retrieval results caches."""
+        return {
+            "query_embeddings": self.__query_embeddings_cache.stats if self.__query_embeddings_cache else {},
+            "results": self.__results_cache.stats if self.__results_cache else {},
+        }
+
+    def __get_manifest_file(self) -> Path:
+        return self.vectorstore_path / "manifest.json"
+
+    def __empty_manifest(self) -> dict:
+        return {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "embeddings": embedding_namespace(self.embedding_model),
+            "documents": {}
+        }
+
+    def __save_manifest(self):
+        def write_manifest(path: Path):
+            with open(path, 'w') as f:
+                json.dump(self.__manifest, f)
+
+        self.__write_atomic(self.__get_manifest_file(), write_manifest)
+
+    def __load_manifest(self) -> dict:
+        """Loads the manifest describing which chunk ids belong to which source file.
+        A manifest created with different splitting parameters or another embedding model is discarded, since none of
+        its chunks can be reused. Manifests without the embedding model are assumed to match the current one.
+
+        Returns:
+            dict: manifest with the splitting parameters and per-file hash, mtime and chunk ids
+        """
+        manifest_file = self.__get_manifest_file()
+        if not manifest_file.exists():
+            return self.__empty_manifest()
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("chunk_size") != self.chunk_size or manifest.get("chunk_overlap") != self.chunk_overlap:
+            logger.info("Splitting parameters changed, discarding the manifest.")
+            return self.__empty_manifest()
+        namespace = embedding_namespace(self.embedding_model)
+        if manifest.setdefault("embeddings", namespace) != namespace:
+            logger.info("Embedding model changed, discarding the manifest.")
+            return self.__empty_manifest()
+        return manifest
+
+    def find_document(self, digest: str) -> Optional[Path]:
+        """Looks up an already ingested document by the SHA-256 hash of its content.
+        Only files unchanged since their ingestion are considered.
+
+        Args:
+            digest (str): hexadecimal digest of the document content
+
+        Returns:
+            Optional[Path]: path to the ingested document with the same content, None if there is none
+        """
+        for name, entry in self.__load_manifest()["documents"].items():
+            path = self.documents_path / name
+            # A file replaced after it was ingested no longer has the content recorded in the manifest.
+            if entry["hash"] == digest and path.is_file() and path.stat().st_mtime == entry["mtime"]:
+                return path
+        return None
+
+    def __get_index_file(self) -> Path:
+        return self.vectorstore_path / "index.faiss"
+
+    def __get_docstore_file(self) -> Path:
+        return self.vectorstore_path / "docstore.json"
+
+    def __get_bm25_file(self) -> Path:
+        return self.vectorstore_path / "bm25.json"
+
+    @staticmethod
+    def __write_atomic(path: Path, write):
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
     def __save_vectorstore(self, vectorstore: FAISS):
-        with open(self.__get_vectorstore_file(), 'wb') as f:
-            pickle.dump(vectorstore, f)
+        """Saves the raw FAISS index, the docstore and the keyword index as separate files.
+        All files are replaced atomically, so processes reading the vectorstore never see a partially written file.
+
+        Args:
+            vectorstore (FAISS): vectorstore to save
+        """
+        documents = {}
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            doc = vectorstore.docstore.search(doc_id)
+            documents[doc_id] = {"page_content": doc.page_content, "metadata": doc.metadata}
+        docstore = {
+            "index_to_docstore_id": [vectorstore.index_to_docstore_id[i] for i in range(len(vectorstore.index_to_docstore_id))],
+            "documents": documents
+        }
+
+        def write_docstore(path: Path):
+            with open(path, 'w') as f:
+                json.dump(docstore, f, default=str)
+
+        self.__write_atomic(self.__get_index_file(), lambda path: faiss.write_index(vectorstore.index, str(path)))
+        self.__write_atomic(self.__get_docstore_file(), write_docstore)
+        self.__write_atomic(self.__get_bm25_file(), self.__bm25.save)
+        (self.vectorstore_path / "vectorstore.pkl").unlink(missing_ok=True)
+        self.__save_manifest()
         self.__save_state()
 
-    def __load_vectorstore(self) -> Optional[FAISS]:
-        vectorstore_file = self.__get_vectorstore_file()
-        if not vectorstore_file.exists():
+    def __load_vectorstore(self, writable: bool = False) -> Optional[FAISS]:
+        """Loads the vectorstore from the raw FAISS index and the docstore together with the keyword index.
+        By default the index is memory-mapped read-only, so loading is almost instant and the index pages are
+        shared by every process that opens it. Such an index must not be modified.
+
+        Args:
+            writable (bool, optional): Whether to read the index into memory so that it can be modified. Defaults to False.
+
+        Returns:
+            Optional[FAISS]: loaded vectorstore or None if there is no saved vectorstore
+        """
+        index_file = self.__get_index_file()
+        docstore_file = self.__get_docstore_file()
+        if not index_file.exists() or not docstore_file.exists():
             return None
-        with open(vectorstore_file, 'rb') as f:
-            return pickle.load(f)
 
-    @property
-    def retriever(self) -> VectorStoreRetriever:
-        if not self.__retriever or self.__documents_changed_check():
+        if writable:
+            index = faiss.read_index(str(index_file))
+        else:
+            index = faiss.read_index(str(index_file), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        apply_search_params(index, self.index_config)
+
+        with open(docstore_file, 'r') as f:
+            docstore = json.load(f)
+        documents = {
+            doc_id: Document(id=doc_id, page_content=doc["page_content"], metadata=doc["metadata"])
+            for doc_id, doc in docstore["documents"].items()
+        }
+        index_to_docstore_id = dict(enumerate(docstore["index_to_docstore_id"]))
+
+        bm25_file = self.__get_bm25_file()
+        if bm25_file.exists():
+            self.__bm25 = BM25Index.load(bm25_file)
+        else:
+            self.__bm25 = BM25Index()
+            self.__bm25.add(documents.keys(), (doc.page_content for doc in documents.values()))
+        
+        return FAISS(self.__embeddings, index, InMemoryDocstore(documents), index_to_docstore_id)
+
+    def __add_batch(self, batch: List[Tuple[str, Document]]):
+        """Embeds a batch of chunks and adds it to the vectorstore, creating the vectorstore if needed.
+
+        Args:
+            batch (List[Tuple[str, Document]]): pairs of chunk id and chunk
+        """
+        ids = [chunk_id for chunk_id, _ in batch]
+        texts = [chunk.page_content for _, chunk in batch]
+        metadatas = [chunk.metadata for _, chunk in batch]
+        text_embeddings = list(zip(texts, self.__embeddings.embed_documents(texts)))
+        if self.__vectorstore is None:
+            self.__vectorstore = FAISS.from_embeddings(text_embeddings, self.__embeddings, metadatas=metadatas, ids=ids)
+        else:
+            self.__vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        self.__bm25.add(ids, texts)
+
+    def __index_vectors(self) -> np.ndarray:
+        """Returns the vectors of the current index in index order.
+        Flat, HNSW and IVF indexes store the vectors exactly and reconstruct them without the embedding model.
+        IVF-PQ keeps only lossy codes, its vectors are embedded again (from the embedding cache, if enabled).
+        """
+        index = self.__vectorstore.index
+        kind = index_kind(index)
+        if kind in ('flat', 'hnsw'):
+            return index.reconstruct_n(0, index.ntotal)
+        if kind == 'ivf':
+            index.make_direct_map()
+            return index.reconstruct_n(0, index.ntotal)
+        texts = [self.__vectorstore.docstore.search(self.__vectorstore.index_to_docstore_id[i]).page_content
+                 for i in range(index.ntotal)]
+        return np.array(self.__embeddings.embed_documents(texts), dtype=np.float32)
+
+    def __delete_chunks(self, ids: List[str]):
+        """Deletes chunks from the vectorstore.
+        Only the flat index supports positional removal, approximate indexes are rebuilt from the remaining vectors.
+
+        Args:
+            ids (List[str]): ids of the chunks to delete
+        """
+        self.__bm25.remove(ids)
+        if index_kind(self.__vectorstore.index) == 'flat':
+            self.__vectorstore.delete(ids)
+            return
+
+        removed = set(ids)
+        vectors = self.__index_vectors()
+        keep = [i for i in range(len(vectors)) if self.__vectorstore.index_to_docstore_id[i] not in removed]
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors[keep])
+        self.__vectorstore.docstore.delete(ids)
+        self.__vectorstore.index_to_docstore_id = {
+            position: self.__vectorstore.index_to_docstore_id[i] for position, i in enumerate(keep)
+        }
+        self.__vectorstore.index = index
+
+    def __finalize_index(self):
+        """Converts the index to the type resolved from index_config for the current number of vectors.
+        New chunks are always added to the existing index, so the conversion happens only when the resolved type changes,
+        e.g. once the corpus grows past the flat threshold or there is enough vectors to train an IVF index.
+        """
+        index = self.__vectorstore.index
+        target = self.index_config.resolve(index.ntotal)
+        if index_kind(index) != target:
+            logger.info(f"Converting {index_kind(index)} index with {index.ntotal} vectors to {target} index...")
+            self.__vectorstore.index = build_index(self.index_config, self.__index_vectors())
+        else:
+            apply_search_params(index, self.index_config)
+
+    def index_report(self, queries: List[str], configs: List[IndexConfig]) -> List[Dict]:
+        """Compares recall@k and latency of the given index configurations against the exact flat index
+        on the vectors of the current corpus.
+
+        Args:
+            queries (List[str]): sample questions
+            configs (List[IndexConfig]): index configurations to compare
+
+        Returns:
+            List[Dict]: recall and latency report, see recall_latency_report
+        """
+        self.retriever  # makes sure the vectorstore is loaded and up to date
+        vectors = self.__index_vectors()
+        query_vectors = np.array([self.__embeddings.embed_query(query) for query in queries], dtype=np.float32)
+        return recall_latency_report(vectors, query_vectors, configs, self.k)
+
+    def __update_vectorstore(self, progress: Optional[Callable[[int, int], None]] = None) -> FAISS:
+        """Brings the vectorstore up to date with the documents directory.
+        Files are compared by content hash (hashing is skipped when the mtime did not change), chunks of removed
+        or changed files are deleted from the index and only new or changed files are loaded, split and embedded.
+        Chunks are streamed from the loaders and embedded in batches bounded by batch_size and batch_max_mb,
+        so the embedding batch buffer stays bounded. The parsed documents of the worker pool window, the docstore
+        and the index still grow with the corpus.
+        The update works on a writable copy of the last saved vectorstore, the vectorstore being served is never modified.
+
+        Args:
+            progress (Callable[[int, int], None], optional): called with the number of processed and total documents
+                to (re)index. Defaults to None.
+
+        Raises:
+            ValueError: There must be at least one document in documents folder!
+
+        Returns:
+            FAISS: updated vectorstore
+        """
+        self.__manifest = self.__load_manifest()
+        if self.__embedding_cache is not None:
+            self.__embedding_cache.reset_stats()
+        self.__vectorstore = None
+        if self.__manifest["documents"]:
+            self.__vectorstore = self.__load_vectorstore(writable=True)
+        if self.__vectorstore is None:
+            self.__manifest = self.__empty_manifest()
+            self.__bm25 = BM25Index()
+
+        entries = self.__manifest["documents"]
+        current = {path.name: path for path in sorted(self.documents_files)}
+        if len(current) == 0:
+            raise ValueError("There must be at least one document in documents folder!")
+
+        outdated_ids = []
+        to_index = []
+        for name in set(entries) - set(current):
+            logger.info(f"Removing document from vectorstore: {name}")
+            outdated_ids.extend(entries.pop(name)["ids"])
+
+        for name, path in current.items():
+            mtime = path.stat().st_mtime
+            entry = entries.get(name)
+            if entry and entry["mtime"] == mtime:
+                continue
+            digest = file_hash(path)
+            if entry and entry["hash"] == digest:
+                entry["mtime"] = mtime
+                continue
+            if entry:
+                logger.info(f"Document changed, replacing its chunks: {name}")
+                outdated_ids.extend(entry["ids"])
+            to_index.append((name, path, digest, mtime))
+
+        if outdated_ids and self.__vectorstore is not None:
+            self.__delete_chunks(outdated_ids)
+
+        files = {path: (name, digest, mtime) for name, path, digest, mtime in to_index}
+        batch_max_bytes = self.batch_max_mb * 1024 * 1024
+        batch: List[Tuple[str, Document]] = []
+        batch_bytes = 0
+        documents = chunks_count = failed = 0
+        start = time.perf_counter()
+        if progress:
+            progress(0, len(files))
+        for path, chunks in self.__load_and_split_documents(list(files)):
+            name, digest, mtime = files[path]
+            if progress:
+                progress(documents + failed + 1, len(files))
+            if chunks is None:
+                entries.pop(name, None)
+                failed += 1
+                continue
+            logger.info(f"Indexing document: {name}")
+            ids = [uuid.uuid4().hex for _ in chunks]
+            entries[name] = {"hash": digest, "mtime": mtime, "ids": ids}
+            documents += 1
+            chunks_count += len(chunks)
+            for chunk_id, chunk in zip(ids, chunks):
+                batch.append((chunk_id, chunk))
+                batch_bytes += len(chunk.page_content.encode('utf-8'))
+                if len(batch) >= self.batch_size or batch_bytes >= batch_max_bytes:
+                    self.__add_batch(batch)
+                    batch, batch_bytes = [], 0
+        if batch:
+            self.__add_batch(batch)
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        self.build_stats = {
+            "documents": documents,
+            "chunks": chunks_count,
+            "failed": failed,
+            "seconds": elapsed,
+            "documents_per_second": documents / elapsed,
+            "chunks_per_second": chunks_count / elapsed,
+        }
+        if documents:
+            logger.info(f"Ingestion throughput: {self.build_stats['documents_per_second']:.2f} documents/s, "
+                        f"{self.build_stats['chunks_per_second']:.2f} chunks/s.")
+
+        if self.__vectorstore is None:
+            raise ValueError("There must be at least one document in documents folder!")
+        self.__finalize_index()
+
+        logger.info(f"Vectorstore updated: {documents} document(s) indexed, {failed} failed, "
+                    f"{len(outdated_ids)} chunk(s) removed.")
+        if self.__embedding_cache is not None:
+            logger.info(f"Embedding cache: {self.__embedding_cache.hits} hit(s), {self.__embedding_cache.misses} miss(es).")
+        self.__save_vectorstore(self.__vectorstore)
+        self.__vectorstore = self.__load_vectorstore()
+        return self.__vectorstore
+
+    def __create_retriever(self, vectorstore: FAISS) -> BaseRetriever:
+        if self.hybrid:
+            retriever = HybridRetriever(vectorstore=vectorstore, bm25=self.__bm25, k=self.k)
+        else:
+            retriever = vectorstore.as_retriever(search_kwargs={"k": self.k})
+        if self.__results_cache is not None:
+            retriever = CachedRetriever(retriever=retriever, cache=self.__results_cache, index_version=self.__index_version)
+        return retriever
+
+    def __reload_saved_vectorstore(self):
+        """Swaps in the last saved vectorstore when it was updated on disk, e.g. by another worker process.
+        Skipped while an update is running, the update swaps the retriever itself once it is finished."""
+        state_file = self.__get_state_file()
+        if not state_file.exists():
+            return
+        mtime = state_file.stat().st_mtime
+        if mtime == self.__state_mtime or not self.__update_lock.acquire(blocking=False):
+            return
+        try:
+            vectorstore = self.__load_vectorstore()
+            if vectorstore:
+                self.__set_index_version((self.__load_state() or {}).get("version", ""))
+                self.__vectorstore = vectorstore
+                self.__retriever = self.__create_retriever(vectorstore)
+                self.__state_mtime = mtime
+        finally:
+            self.__update_lock.release()
+
+    def refresh(self, progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """Brings the vectorstore up to date with the documents directory.
+        The current retriever keeps serving the last good index until the updated one is ready and swapped in.
+
+        Args:
+            progress (Callable[[int, int], None], optional): called with the number of processed and total documents
+                to (re)index. Defaults to None.
+
+        Raises:
+            ValueError: There must be at least one document in documents folder!
+
+        Returns:
+            bool: whether the vectorstore was updated
+        """
+        with self.__update_lock:
+            if not self.documents_files and self.__load_state() is None:
+                logger.info("No documents to index.")
+                return False
+
             if not self.__should_rebuild_vectorstore():
-                logger.info("Loading info from vectorstore...")
-                vectorstore = self.__load_vectorstore()
-                if vectorstore:
-                    logger.info("Loading info from vectorstore successful.")
-                    self.__retriever = vectorstore.as_retriever(search_kwargs={"k": self.k})
+                if self.__retriever is None:
+                    vectorstore = self.__load_vectorstore()
+                    if vectorstore:
+                        self.__set_index_version((self.__load_state() or {}).get("version", ""))
+                        self.__vectorstore = vectorstore
+                        self.__retriever = self.__create_retriever(vectorstore)
+                        self.__state_mtime = self.__get_state_file().stat().st_mtime
+                        return False
+                else:
+                    return False
+
+            self.__cached_documents = self.__current_documents()
+            vectorstore = self.__update_vectorstore(progress)
+            self.__retriever = self.__create_retriever(vectorstore)
+            self.__state_mtime = self.__get_state_file().stat().st_mtime
+            return True
+
+    @property
+    def retriever(self) -> Optional[BaseRetriever]:
+        """Retriever of the vectorstore. With auto_refresh the vectorstore is updated first when the documents changed,
+        otherwise the last saved vectorstore is served (None if nothing was indexed yet) and updates are left to refresh."""
+        if not self.auto_refresh:
+            self.__reload_saved_vectorstore()
+            return self.__retriever
+
+        if not self.__retriever or self.__documents_changed():
+            # Concurrent queries run in worker threads, only one of them may update the index.
+            with self.__update_lock:
+                if self.__retriever and not self.__documents_changed():
                     return self.__retriever
-                
-            chunks = self.__load_and_split_documents()
-            vectorstore = FAISS.from_documents(chunks, self.embedding_model)
-            self.__save_vectorstore(vectorstore)
-            self.__retriever = vectorstore.as_retriever(search_kwargs={"k": self.k})
+
+                documents = self.__current_documents()
+                if not self.__should_rebuild_vectorstore():
+                    logger.info("Loading info from vectorstore...")
+                    vectorstore = self.__vectorstore or self.__load_vectorstore()
+                    if vectorstore:
+                        logger.info("Loading info from vectorstore successful.")
+                        self.__set_index_version(self.__load_state().get("version", ""))
+                        self.__vectorstore = vectorstore
+                        self.__retriever = self.__create_retriever(vectorstore)
+                        self.__cached_documents = documents
+                        return self.__retriever
+
+                self.__cached_documents = documents
+                vectorstore = self.__update_vectorstore()
+                self.__retriever = self.__create_retriever(vectorstore)
         return self.__retriever
+
+    def relevance(self, query: str) -> Optional[float]:
+        """Computes how well the indexed documents match the query, as the highest cosine similarity between
+        the query and the retrieved chunks. Both the retrieval and the chunk vectors usually come from the caches.
+
+        Args:
+            query (str): searched query
+
+        Returns:
+            Optional[float]: similarity in range [-1, 1], None if nothing is indexed or retrieved
+        """
+        retriever = self.retriever
+        if retriever is None:
+            return None
+        documents = retriever.invoke(query)
+        if not documents:
+            return None
+
+        query_vector = np.asarray(self.__embeddings.embed_query(query), dtype=np.float32)
+        vectors = np.asarray(self.__embeddings.embed_documents([document.page_content for document in documents]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+        return float(np.max(vectors @ query_vector / np.maximum(norms, 1e-12)))
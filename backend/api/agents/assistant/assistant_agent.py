@@ -1,20 +1,24 @@
+import asyncio
 import logging
-import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Union, Optional, TypedDict, Literal, Dict
+from typing import Any, AsyncIterator, Union, Optional, TypedDict, Literal, Dict
 
 from langchain_core.embeddings import Embeddings
 from langgraph.graph import StateGraph, END
 from langsmith import traceable
 from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import StreamWriter
 
-from backend.api.agents.RAG.rag_agent import RAGAgent
+from backend.api.agents.RAG.collection_registry import CollectionRegistry, validate_collection_id
+from backend.api.agents.RAG.rag_agent import RAGAgent, RAGMode
 from backend.api.agents.assistant.decision_agent import ContextDecisionAgent
 from backend.api.agents.assistant.summarize_agent import SummarizeAgent
 from backend.api.agents.assistant.task_planner import TaskPlanner
 from backend.api.mcp_client import MCPClient
+from backend.config import Config
 from backend.core.agents.base_agent import BaseAgent
+from backend.core.concurrency import amap_concurrently, validate_concurrency
 from backend.core.validation_methods import validate_string
 
 logger = logging.getLogger(__name__)
@@ -24,56 +28,118 @@ class AssistantAgent(BaseAgent):
     embedding_model: Embeddings
     documents_path: Optional[Union[str, Path]] = None
     tavily_max_results: int = 5
+    collections: Optional[CollectionRegistry] = None
+    max_concurrency: int = Config.MAX_TASK_CONCURRENCY
+    rag_mode: RAGMode = Config.RAG_MODE
+    context_decision_mode: Literal['per_task', 'batched'] = Config.CONTEXT_DECISION_MODE
+    context_accept_score: Optional[float] = Config.CONTEXT_ACCEPT_SCORE
+    context_reject_score: Optional[float] = Config.CONTEXT_REJECT_SCORE
+    mcp_client: Optional[MCPClient] = None
+
+    def __post_init__(self):
+        if not validate_concurrency(self.max_concurrency):
+            raise ValueError("Concurrency limit must be over 0!")
+
+        if self.context_decision_mode not in ('per_task', 'batched'):
+            raise ValueError("Context decision mode must be 'per_task' or 'batched'!")
+
+        for score in (self.context_accept_score, self.context_reject_score):
+            if score is not None and (not isinstance(score, (int, float)) or not -1 <= score <= 1):
+                raise ValueError("Context score thresholds must be in range [-1, 1]!")
+
+        if self.context_accept_score is not None and self.context_reject_score is not None \
+                and self.context_reject_score >= self.context_accept_score:
+            raise ValueError("Context reject score must be lower than the accept score!")
+
+        if self.mcp_client is None:
+            self.mcp_client = MCPClient(f"http://{Config.MCP_HOST}:{Config.MCP_PORT}")
+
+        super().__post_init__()
     
     @traceable(name="Assistant Agent")
-    def invoke(self, question: str) -> str:
+    def invoke(self, question: str, collection: str = Config.DEFAULT_COLLECTION, fresh: bool = False) -> str:
         """
         Invokes the assistant agent with a given question.
 
         Args:
             question (str): The question to be answered by the agent.
+            collection (str, optional): Id of the document collection searched for context. Defaults to Config.DEFAULT_COLLECTION.
+            fresh (bool, optional): Whether exam questions are generated anew instead of reused from the cache. Defaults to False.
 
         Raises:
             ValueError: If the question is not a valid nonempty string.
+            ValueError: If the collection id is not valid.
 
         Returns:
             str: The answer to the question provided by the agent.
         """
-        if not validate_string(question):
-            raise ValueError("Question must be a valid nonempty string!")
-        
-        response = self.graph.invoke({
-            'message': question, 
-            'web_search_iterations': 0, 
-            'result': '',
-            'tasks_': {},
-            'context_': {},
-            'context_decisions_': {},
-            'question_tasks_': {},
-            'generated_questions_': {},
-        })
-        return response['result']
+        # All graph nodes are asynchronous, the synchronous entry point runs the graph in its own event loop.
+        async def run() -> str:
+            try:
+                return await self.ainvoke(question, collection, fresh)
+            finally:
+                # The MCP session of this loop can't be reused once the loop is closed.
+                await self.mcp_client.close()
+
+        return asyncio.run(run())
     
     @traceable(name="Assistant Agent")
-    async def ainvoke(self, question: str) -> str:
+    async def ainvoke(self, question: str, collection: str = Config.DEFAULT_COLLECTION, fresh: bool = False) -> str:
         """
         Asynchronously invokes the assistant agent with a given question.
         This method is designed to handle the question and return the result asynchronously.
 
         Args:
             question (str): The question to be answered by the agent.
+            collection (str, optional): Id of the document collection searched for context. Defaults to Config.DEFAULT_COLLECTION.
+            fresh (bool, optional): Whether exam questions are generated anew instead of reused from the cache. Defaults to False.
 
         Raises:
             ValueError: If the question is not a valid nonempty string.
+            ValueError: If the collection id is not valid.
 
         Returns:
             str: The answer to the question provided by the agent.
         """
+        response = await self.graph.ainvoke(self.__initial_state(question, collection, fresh))
+        return response['result']
+    
+    async def astream(self, question: str, collection: str = Config.DEFAULT_COLLECTION, fresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronously invokes the assistant agent with a given question and yields progress events as soon as they are available:
+        - {'type': 'tasks', 'tasks': {num: task}} once the question is split into tasks,
+        - {'type': 'status', 'stage': str} when the agent enters a long running stage,
+        - {'type': 'token', 'task': num, 'content': str} for every generated token of a task's summary,
+        - {'type': 'task', 'task': num, 'title': str, 'summary': str, 'questions': Optional[str]} once a task's section is complete,
+        - {'type': 'result', 'answer': str} with the whole answer, as returned by ainvoke.
+
+        Args:
+            question (str): The question to be answered by the agent.
+            collection (str, optional): Id of the document collection searched for context. Defaults to Config.DEFAULT_COLLECTION.
+            fresh (bool, optional): Whether exam questions are generated anew instead of reused from the cache. Defaults to False.
+
+        Raises:
+            ValueError: If the question is not a valid nonempty string.
+            ValueError: If the collection id is not valid.
+
+        Yields:
+            Dict[str, Any]: The next progress event.
+        """
+        async for event in self.graph.astream(self.__initial_state(question, collection, fresh), stream_mode="custom"):
+            yield event
+    
+    @staticmethod
+    def __initial_state(question: str, collection: str, fresh: bool) -> Dict[str, Any]:
         if not validate_string(question):
             raise ValueError("Question must be a valid nonempty string!")
         
-        response = await self.graph.ainvoke({
+        if not validate_collection_id(collection):
+            raise ValueError("Collection id must consist of 1 to 64 letters, digits, '_' or '-'!")
+        
+        return {
             'message': question, 
+            'collection': collection,
+            'fresh': fresh,
             'web_search_iterations': 0, 
             'result': '',
             'tasks_': {},
@@ -81,8 +147,7 @@ class AssistantAgent(BaseAgent):
             'context_decisions_': {},
             'question_tasks_': {},
             'generated_questions_': {},
-        })
-        return response['result']
+        }
     
     def _create_agent(self) -> CompiledStateGraph:
         """
@@ -92,10 +157,10 @@ class AssistantAgent(BaseAgent):
             CompiledStateGraph: A compiled state graph representing the workflow of the assistant agent.
         """
         task_planner = TaskPlanner(self.llm)
-        rag_agent = RAGAgent(self.llm, self.embedding_model, self.documents_path)
+        rag_agent = RAGAgent(self.llm, self.embedding_model, self.documents_path, self.collections, self.rag_mode)
         ctx_decision_agent = ContextDecisionAgent(self.llm)
         summarize_agent = SummarizeAgent(self.llm)
-        mcp_client = MCPClient(f"http://{os.getenv('MCP_HOST', 'localhost')}:{os.getenv('MCP_PORT', '8000')}")
+        mcp_client = self.mcp_client
         
         MAX_ITERATIONS = 3
         
@@ -106,6 +171,8 @@ class AssistantAgent(BaseAgent):
             the result of the processing, and various dictionaries to hold tasks, context, decisions, and generated questions.
             """
             message: str
+            collection: str
+            fresh: bool
             web_search_iterations: int
             result: str
             tasks_: Dict[int, str]
@@ -116,27 +183,29 @@ class AssistantAgent(BaseAgent):
             
         # Nodes
         @traceable(name="Task Planner")
-        def task_planner_node(state: AssistantState) -> AssistantState:
+        async def task_planner_node(state: AssistantState, writer: StreamWriter) -> AssistantState:
             """Node responsible for planning tasks based on the input message.
 
             Args:
                 state (AssistantState): The current state of the assistant agent.
+                writer (StreamWriter): Writer of the events streamed by astream.
 
             Returns:
                 AssistantState: The updated state after planning tasks.
             """
-            tasks_str = task_planner.invoke(state['message'])
+            tasks_str = await task_planner.ainvoke(state['message'])
             tasks = TaskPlanner.result_to_dict(tasks_str)
             
             for num, tasks in tasks.items():
                 state['tasks_'][num] = tasks['MAIN']
                 state['question_tasks_'][num] = tasks['QUES']
             
+            writer({'type': 'tasks', 'tasks': dict(state['tasks_'])})
             return state
             
         
         @traceable(name="RAG")
-        def rag_node(state: AssistantState) -> AssistantState:
+        async def rag_node(state: AssistantState) -> AssistantState:
             """Node responsible for retrieving context information using the RAG agent.
             This node processes each task in the state and retrieves relevant context using the RAG agent.
 
@@ -146,13 +215,16 @@ class AssistantAgent(BaseAgent):
             Returns:
                 AssistantState: The updated state after retrieving context.
             """
-            for num, task in state['tasks_'].items():
-                state['context_'][num] = rag_agent.invoke(task) + '\n'
+            async def lookup(task: str) -> str:
+                return await rag_agent.ainvoke(task, state['collection']) + '\n'
+
+            contexts = await amap_concurrently(lookup, state['tasks_'], self.max_concurrency)
+            state['context_'].update(contexts)
             
             return state
         
         @traceable(name="Web search")
-        async def web_node(state: AssistantState) -> AssistantState:
+        async def web_node(state: AssistantState, writer: StreamWriter) -> AssistantState:
             """
             Node responsible for performing web searches for tasks that do not have sufficient context.
             This node checks the context decisions for each task and performs a call to mcp server for 
@@ -160,66 +232,84 @@ class AssistantAgent(BaseAgent):
 
             Args:
                 state (AssistantState): The current state of the assistant agent.
+                writer (StreamWriter): Writer of the events streamed by astream.
 
             Returns:
                 AssistantState: The updated state after performing web searches.
             """
-            for num, task in state['tasks_'].items():
-                if state['context_decisions_'][num] == 'Yes':
-                    continue
-                
+            pending = [num for num in state['tasks_'] if state['context_decisions_'][num] != 'Yes']
+            writer({'type': 'status', 'stage': 'web_search'})
+            logger.info(f"Calling mcp server for web search of {len(pending)} task(s)")
+            # All searches share one JSON-RPC batch request.
+            results = await mcp_client.call_tools([("search_web", {"query": state['tasks_'][num]}) for num in pending])
+
+            for num, result in zip(pending, results):
                 context = state['context_'].get(num, '')
 
                 if context == 'No context available for this question.':
                     context = ''
                 
-                logger.info(f"Calling mcp server for web search with context: {context}")
-                state['context_'][num] = context + await mcp_client.call_tool("search_web", {"query": task})
+                state['context_'][num] = context + result
                 
             state['web_search_iterations'] += 1
             
             return state
         
         @traceable(name="Generate questions")
-        async def question_node(state: AssistantState) -> AssistantState:
+        async def question_node(state: AssistantState, writer: StreamWriter) -> AssistantState:
             """Node responsible for generating exam-style questions based on the tasks and context.
             This node iterates through the tasks and generates questions using the mcp server exam generation tool.
 
             Args:
                 state (AssistantState): The current state of the assistant agent.
+                writer (StreamWriter): Writer of the events streamed by astream.
 
             Returns:
                 AssistantState: The updated state after generating questions.
             """
-            for num, ques in state['question_tasks_'].items():
-                if not ques:
-                    continue
-                    
-                context = state['context_'].get(num, '')
-                
-                logger.info(f"Calling mcp server for question generation")
-                state['generated_questions_'][num] = await mcp_client.call_tool("create_exam_questions", {"query": ques, "context": context})
+            pending = [num for num, ques in state['question_tasks_'].items() if ques]
+            if pending:
+                writer({'type': 'status', 'stage': 'question_generation'})
+            logger.info(f"Calling mcp server for question generation of {len(pending)} task(s)")
+            results = await mcp_client.call_tools([
+                ("create_exam_questions", {"query": state['question_tasks_'][num], "context": state['context_'].get(num, ''), "fresh": state['fresh']})
+                for num in pending
+            ])
+            state['generated_questions_'].update(zip(pending, results))
             
             return state
         
         @traceable(name="Summarize Results")
-        def sumarize_node(state: AssistantState) -> AssistantState:
+        async def sumarize_node(state: AssistantState, writer: StreamWriter) -> AssistantState:
             """
             Node responsible for summarizing the results of the tasks and generated questions.
+            The tokens of every summary and every finished task section are streamed as soon as they are generated.
 
             Args:
                 state (AssistantState): The current state of the assistant agent.
+                writer (StreamWriter): Writer of the events streamed by astream.
 
             Returns:
                 AssistantState: The updated state after summarizing the results.
             """
             summary = ""
             questions = state['generated_questions_']
+            async def summarize(num: int) -> str:
+                tokens = []
+                async for token in summarize_agent.astream(f"MESSAGE: {state['tasks_'][num]}\nCONTEXT: {state['context_'].get(num, '')}"):
+                    tokens.append(token)
+                    writer({'type': 'token', 'task': num, 'content': token})
+                result = ''.join(tokens)
+                writer({'type': 'task', 'task': num, 'title': state['tasks_'][num], 'summary': result, 'questions': questions.get(num)})
+                return result
+
+            summaries = await amap_concurrently(summarize, {num: num for num in state['tasks_']}, self.max_concurrency)
             
-            for num, task in state['tasks_'].items():
-                context = state['context_'].get(num, '')
+            # Sections follow the task numbering regardless of the order in which the summaries finished.
+            for num in sorted(state['tasks_']):
+                task = state['tasks_'][num]
                 summary += '-'*10 + f' {task} ' + '-'*10 + '\n\n'
-                summary += summarize_agent.invoke(f"MESSAGE: {task}\nCONTEXT: {context}") + '\n'
+                summary += summaries[num] + '\n'
                 question_set = questions.get(num, None)
                 
                 if question_set:
@@ -228,10 +318,11 @@ class AssistantAgent(BaseAgent):
                 summary += '\n\n'
                 
             state['result'] = summary
+            writer({'type': 'result', 'answer': summary})
             return state
             
         #Conditions' routers
-        def context_decision(state: AssistantState) -> Literal['question_generation', 'web_search']:
+        async def context_decision(state: AssistantState) -> Literal['question_generation', 'web_search']:
             """
             Decides whether to proceed to question generation or web search based on the context decisions and iterations.
 
@@ -241,9 +332,36 @@ class AssistantAgent(BaseAgent):
             if state['web_search_iterations'] >= MAX_ITERATIONS:
                 return 'question_generation'
             
-            for num, task in state['tasks_'].items():
-                context = state['context_'].get(num, '')
-                state['context_decisions_'][num] = ctx_decision_agent.invoke(f"MESSAGE: {task}\nCONTEXT: {context}")
+            # Only tasks whose context changed since they were judged insufficient need a new decision.
+            pending = {num: task for num, task in state['tasks_'].items() if state['context_decisions_'].get(num) != 'Yes'}
+
+            gated = self.context_accept_score is not None or self.context_reject_score is not None
+            if gated and state['web_search_iterations'] == 0:
+                async def score(task: str) -> Optional[float]:
+                    return await asyncio.to_thread(rag_agent.relevance, task, state['collection'])
+
+                for num, relevance in (await amap_concurrently(score, pending, self.max_concurrency)).items():
+                    if relevance is None:
+                        continue
+                    if self.context_accept_score is not None and relevance >= self.context_accept_score:
+                        state['context_decisions_'][num] = 'Yes'
+                    elif self.context_reject_score is not None and relevance <= self.context_reject_score:
+                        state['context_decisions_'][num] = 'No'
+                    else:
+                        continue
+                    logger.info(f"Context decision for task {num} taken from retrieval score {relevance:.2f}")
+                    del pending[num]
+
+            if self.context_decision_mode == 'batched':
+                decisions = await ctx_decision_agent.adecide_batch(
+                    {num: (task, state['context_'].get(num, '')) for num, task in pending.items()}
+                )
+            else:
+                async def decide(num: int) -> str:
+                    return await ctx_decision_agent.ainvoke(f"MESSAGE: {state['tasks_'][num]}\nCONTEXT: {state['context_'].get(num, '')}")
+
+                decisions = await amap_concurrently(decide, {num: num for num in pending}, self.max_concurrency)
+            state['context_decisions_'].update(decisions)
                 
             if all(decision == 'Yes' for decision in state['context_decisions_'].values()):
                 return 'question_generation'
@@ -1,10 +1,22 @@
-from typing import ClassVar
+from typing import ClassVar, Dict, List, Literal, Tuple
 
 from langgraph.prebuilt import create_react_agent
+from pydantic import BaseModel, Field
 
 from backend.core.agents.base_agent import BaseAgent
 
 
+class ContextDecision(BaseModel):
+    """Decision whether the context of a single task is sufficient."""
+    task: int = Field(description="number of the task")
+    sufficient: bool = Field(description="whether the context is sufficient to respond to the message of the task")
+
+
+class ContextDecisions(BaseModel):
+    """Decisions for all judged tasks."""
+    decisions: List[ContextDecision]
+
+
 class ContextDecisionAgent(BaseAgent):
     __DEFAULT_PROMPT: ClassVar[str] = """
     You are an expert in decision-making.
@@ -14,12 +26,57 @@ class ContextDecisionAgent(BaseAgent):
     If the context is sufficient, reply with "Yes".  
     If it is not, reply with "No".
     """
+
+    __BATCH_PROMPT: ClassVar[str] = """
+    You are an expert in decision-making.
+    You will be given numbered tasks, each with a message and its related context.
+    For every task determine whether the provided context is sufficient to understand or respond to the message.
+    Return a decision for every task number.
+    """
     
     def __post_init__(self):
         if not hasattr(self, 'prompt') or self.prompt is None:
             self.prompt = self.__DEFAULT_PROMPT
             
         super().__post_init__()
+
+    def __batch_messages(self, tasks: Dict[int, Tuple[str, str]]) -> List[tuple]:
+        content = "\n\n".join(f"TASK {num}:\nMESSAGE: {message}\nCONTEXT: {context}" for num, (message, context) in tasks.items())
+        return [("system", self.__BATCH_PROMPT), ("user", content)]
+
+    @staticmethod
+    def __to_answers(tasks: Dict[int, Tuple[str, str]], result: ContextDecisions) -> Dict[int, Literal['Yes', 'No']]:
+        # Tasks the model skipped are treated as insufficient, so they are looked up on the web rather than dropped.
+        sufficient = {decision.task: decision.sufficient for decision in result.decisions}
+        return {num: 'Yes' if sufficient.get(num, False) else 'No' for num in tasks}
+
+    def decide_batch(self, tasks: Dict[int, Tuple[str, str]]) -> Dict[int, Literal['Yes', 'No']]:
+        """Judges the context of all tasks with a single structured-output LLM call.
+
+        Args:
+            tasks (Dict[int, Tuple[str, str]]): message and context of every task, keyed by the task number
+
+        Returns:
+            Dict[int, Literal['Yes', 'No']]: decision for every task
+        """
+        if not tasks:
+            return {}
+        result = self.llm.with_structured_output(ContextDecisions).invoke(self.__batch_messages(tasks))
+        return self.__to_answers(tasks, result)
+
+    async def adecide_batch(self, tasks: Dict[int, Tuple[str, str]]) -> Dict[int, Literal['Yes', 'No']]:
+        """Asynchronously judges the context of all tasks with a single structured-output LLM call.
+
+        Args:
+            tasks (Dict[int, Tuple[str, str]]): message and context of every task, keyed by the task number
+
+        Returns:
+            Dict[int, Literal['Yes', 'No']]: decision for every task
+        """
+        if not tasks:
+            return {}
+        result = await self.llm.with_structured_output(ContextDecisions).ainvoke(self.__batch_messages(tasks))
+        return self.__to_answers(tasks, result)
     
     def _create_agent(self):
-        return create_react_agent(self.llm, tools=[], prompt=self.prompt)
\ No newline at end of file
+        return create_react_agent(self.llm, tools=[], prompt=self.prompt)
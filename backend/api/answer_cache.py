@@ -0,0 +1,172 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.config import Config
+from backend.core.lru_cache import LRUCache
+
+
+@dataclass
+class _CollectionAnswers:
+    """Answers cached for one collection, built from one version of its index."""
+    index_version: str
+    dimension: int
+    vectors: np.ndarray = field(init=False)
+    answers: List[str] = field(default_factory=list, init=False)
+    created: List[float] = field(default_factory=list, init=False)
+    accessed: List[float] = field(default_factory=list, init=False)
+
+    def __post_init__(self):
+        self.vectors = np.empty((0, self.dimension), dtype=np.float32)
+
+    def remove(self, positions: List[int]):
+        keep = np.setdiff1d(np.arange(len(self.answers)), positions)
+        self.vectors = self.vectors[keep]
+        self.answers = [self.answers[i] for i in keep]
+        self.created = [self.created[i] for i in keep]
+        self.accessed = [self.accessed[i] for i in keep]
+
+
+@dataclass
+class SemanticAnswerCache:
+    """
+    In-memory cache of the answers of previous questions, searched by the cosine similarity of the question embeddings,
+    so near-identical questions (e.g. differently worded) don't run the whole assistant graph again.
+    Every collection has its own small index of normalized question vectors, which is emptied when the collection's
+    index version changes. The least recently used answers are evicted once a collection holds more than max_entries.
+
+    Attributes:
+        embedding_model (Embeddings): model used to embed the questions
+        threshold (float): minimal cosine similarity of a cached question to reuse its answer. Default: Config.ANSWER_CACHE_THRESHOLD
+        max_entries (int): maximum number of answers cached per collection. Default: Config.ANSWER_CACHE_SIZE
+        ttl (float, optional): number of seconds after which an answer expires. Default: Config.ANSWER_CACHE_TTL
+        hits (int): number of lookups answered from the cache
+        misses (int): number of lookups without a similar enough question
+    """
+    embedding_model: Embeddings
+    threshold: float = Config.ANSWER_CACHE_THRESHOLD
+    max_entries: int = Config.ANSWER_CACHE_SIZE
+    ttl: Optional[float] = Config.ANSWER_CACHE_TTL
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    __collections: Dict[str, _CollectionAnswers] = field(default_factory=dict, init=False)
+    __embeddings: LRUCache = field(init=False)
+    __lock: Any = field(default_factory=threading.Lock, init=False)
+
+    def __post_init__(self):
+        if not isinstance(self.threshold, (int, float)) or not -1 <= self.threshold <= 1:
+            raise ValueError("Similarity threshold must be in range [-1, 1]!")
+
+        if not isinstance(self.max_entries, int) or self.max_entries <= 0:
+            raise ValueError("Cache size must be over 0!")
+
+        if self.ttl is not None and (not isinstance(self.ttl, (int, float)) or self.ttl <= 0):
+            raise ValueError("Cache TTL must be over 0 if provided!")
+
+        # The question is embedded once for the lookup and reused when its answer is stored.
+        self.__embeddings = LRUCache(self.max_entries)
+
+    def __embed(self, question: str) -> np.ndarray:
+        vector = self.__embeddings.get(question)
+        if vector is None:
+            vector = np.asarray(self.embedding_model.embed_query(question), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector = vector / norm
+            self.__embeddings.put(question, vector)
+        return vector
+
+    def __answers_for(self, collection: str, index_version: str, dimension: int) -> _CollectionAnswers:
+        answers = self.__collections.get(collection)
+        if answers is None or answers.index_version != index_version or answers.dimension != dimension:
+            answers = _CollectionAnswers(index_version, dimension)
+            self.__collections[collection] = answers
+        return answers
+
+    def __expire(self, answers: _CollectionAnswers, now: float):
+        if self.ttl is not None:
+            expired = [i for i, created in enumerate(answers.created) if now - created > self.ttl]
+            if expired:
+                answers.remove(expired)
+
+    def get(self, question: str, collection: str, index_version: str) -> Optional[Tuple[str, float]]:
+        """Looks up the answer of the most similar cached question.
+
+        Args:
+            question (str): asked question
+            collection (str): id of the searched collection
+            index_version (str): current version of the collection's index
+
+        Returns:
+            Optional[Tuple[str, float]]: the cached answer and the similarity of its question, None if no cached question
+                is similar enough
+        """
+        vector = self.__embed(question)
+        now = time.monotonic()
+        with self.__lock:
+            answers = self.__answers_for(collection, index_version, len(vector))
+            self.__expire(answers, now)
+            if not answers.answers:
+                self.misses += 1
+                return None
+
+            similarities = answers.vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            answers.accessed[best] = now
+            self.hits += 1
+            return answers.answers[best], float(similarities[best])
+
+    def put(self, question: str, collection: str, index_version: str, answer: str):
+        """Caches the answer of a question. An answer generated from another index version than the one of the
+        collection's cached answers is dropped, e.g. when the collection was updated while the answer was generated.
+
+        Args:
+            question (str): asked question
+            collection (str): id of the searched collection
+            index_version (str): version of the collection's index the answer was generated from
+            answer (str): answer of the question
+        """
+        vector = self.__embed(question)
+        now = time.monotonic()
+        with self.__lock:
+            current = self.__collections.get(collection)
+            if current is not None and current.index_version != index_version:
+                return
+            answers = self.__answers_for(collection, index_version, len(vector))
+            self.__expire(answers, now)
+            if answers.answers:
+                # A question that is already cached gets its answer replaced instead of adding a duplicate.
+                similarities = answers.vectors @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= 1 - 1e-6:
+                    answers.remove([best])
+
+            answers.vectors = np.vstack([answers.vectors, vector[np.newaxis]])
+            answers.answers.append(answer)
+            answers.created.append(now)
+            answers.accessed.append(now)
+            if len(answers.answers) > self.max_entries:
+                least_recent = np.argsort(answers.accessed)[:len(answers.answers) - self.max_entries]
+                answers.remove(least_recent.tolist())
+
+    def clear(self):
+        with self.__lock:
+            self.__collections.clear()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": sum(len(answers.answers) for answers in self.__collections.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
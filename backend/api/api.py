@@ -1,18 +1,144 @@
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import uuid
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
 
 from fastapi import UploadFile, HTTPException, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
 
 from backend.config import Config
-from backend.api.agents.assistant.assistant_agent import AssistantAgent
+from backend.api.answer_cache import SemanticAnswerCache
+from backend.api.mcp_client import MCPClient
+from backend.api.startup import StartupTracker
+from backend.core.llm_cache import DiskLLMCache
 from backend.core.models_provider import LLMFactory, EmbeddingFactory
+from backend.core.validation_methods import validate_string, validate_collection_id
 from backend.api.data.query_message import QueryMessage
 from backend.api.data.query_response import QueryResponse
+from backend.api.data.ingestion_job_response import IngestionJobResponse
+
+if TYPE_CHECKING:
+    # Imported by the warm-up, loading faiss, langgraph and the agents mustn't delay the health endpoints.
+    from backend.api.agents.RAG.collection_registry import CollectionRegistry
+    from backend.api.agents.assistant.assistant_agent import AssistantAgent
+    from backend.api.ingestion_jobs import IngestionQueue
 
 load_dotenv()
 logger = logging.getLogger(__name__)
-app = FastAPI()
-assistant = AssistantAgent(LLMFactory.openai(), EmbeddingFactory.huggingface())
+startup = StartupTracker()
+mcp_client = MCPClient(f"http://{Config.MCP_HOST}:{Config.MCP_PORT}")
+
+
+@dataclass
+class Services:
+    """Components of the API that are expensive to create, built by the background warm-up.
+
+    Attributes:
+        embedding_model (Embeddings): model embedding the documents and questions
+        collections (CollectionRegistry): registry of the document collections
+        ingestion_queue (IngestionQueue): queue of the background ingestion jobs
+        assistant (AssistantAgent): agent answering the queries
+        answer_cache (SemanticAnswerCache, optional): cache of the answers of similar questions
+    """
+    embedding_model: Embeddings
+    collections: "CollectionRegistry"
+    ingestion_queue: "IngestionQueue"
+    assistant: "AssistantAgent"
+    answer_cache: Optional[SemanticAnswerCache]
+
+
+services: Optional[Services] = None
+
+
+def _build_services() -> Services:
+    """Loads the models and the saved index of the default collection, timing every startup phase.
+
+    Returns:
+        Services: the warmed up components
+    """
+    with startup.phase("imports"):
+        from backend.api.agents.RAG.collection_registry import CollectionRegistry
+        from backend.api.agents.assistant.assistant_agent import AssistantAgent
+        from backend.api.ingestion_jobs import IngestionQueue
+    with startup.phase("embedding_model"):
+        embedding_model = EmbeddingFactory.huggingface(
+            Config.EMBED_MODEL,
+            backend=Config.EMBED_BACKEND,
+            quantize=Config.EMBED_QUANTIZE,
+            threads=Config.EMBED_THREADS,
+            batch_size=Config.EMBED_BATCH_SIZE,
+            parity_check=Config.EMBED_PARITY_CHECK
+        )
+    with startup.phase("embedding_warmup"):
+        # The first call initializes the runtime, so the first query doesn't pay for it.
+        embedding_model.embed_query("warm-up")
+    with startup.phase("index"):
+        # Vectorstores are only updated by background ingestion jobs, queries are served from the last saved index.
+        collections = CollectionRegistry(embedding_model, provider_kwargs={"auto_refresh": False})
+        collections.get(Config.DEFAULT_COLLECTION).retriever
+    with startup.phase("agents"):
+        # Shared with the MCP server process through the cache file.
+        llm_cache = DiskLLMCache(Config.LLM_CACHE_PATH, Config.LLM_CACHE_MAX_ENTRIES, Config.LLM_CACHE_TTL) if Config.LLM_CACHE else None
+        assistant = AssistantAgent(LLMFactory.openai(cache=llm_cache), embedding_model, collections=collections, mcp_client=mcp_client)
+        answer_cache = SemanticAnswerCache(embedding_model) if Config.ANSWER_CACHE else None
+    return Services(embedding_model, collections, IngestionQueue(collections), assistant, answer_cache)
+
+
+async def _warm_up():
+    global services
+    try:
+        # Loading the models blocks for a while, the event loop keeps serving the health endpoints meanwhile.
+        warmed_up = await asyncio.to_thread(_build_services)
+        warmed_up.ingestion_queue.start()
+        # Picks up documents added or removed while the API was down.
+        warmed_up.ingestion_queue.submit(Config.DEFAULT_COLLECTION)
+        services = warmed_up
+        startup.succeed()
+    except Exception as e:
+        logger.exception("API warm-up failed")
+        startup.fail(e)
+
+
+def _services() -> Services:
+    """Returns the warmed up components.
+
+    Raises:
+        HTTPException: If the warm-up hasn't finished yet or failed.
+
+    Returns:
+        Services: the warmed up components
+    """
+    if services is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service is not ready ({startup.status.value})",
+            headers={"Retry-After": "5"}
+        )
+    return services
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The warm-up runs in the background, so the server starts listening (and answering health checks) right away.
+    warm_up = asyncio.create_task(_warm_up())
+    yield
+    warm_up.cancel()
+    with suppress(asyncio.CancelledError):
+        await warm_up
+    if services is not None:
+        await services.ingestion_queue.stop()
+    await mcp_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,50 +150,206 @@ logging.basicConfig(
 )
 
 
+async def _stream_to_file(file: UploadFile, path: Path, max_bytes: int) -> str:
+    """Streams the uploaded file to disk in chunks, without blocking the event loop on file writes.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        path (Path): Destination path.
+        max_bytes (int): Maximum allowed size of the file in bytes.
+
+    Raises:
+        HTTPException: If the file exceeds the size limit.
+
+    Returns:
+        str: SHA-256 hash of the file content.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await file.read(Config.UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File exceeds the upload limit of {Config.MAX_UPLOAD_MB} MB"
+                )
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    return digest.hexdigest()
+
+@app.get("/healthz")
+async def healthz() -> dict:
+    """Liveness probe, answers as soon as the server is running, also while the API is warming up.
+
+    Returns:
+        dict: {"status": "ok"}
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz() -> JSONResponse:
+    """Readiness probe, succeeds once the models and the default collection's index are loaded.
+
+    Returns:
+        JSONResponse: The warm-up status, the duration of every finished startup phase and the warm-up error, if any.
+            The status code is 200 when ready, 503 otherwise.
+    """
+    return JSONResponse(startup.to_dict(), status_code=200 if startup.ready else 503)
+
 @app.post("/upload")
-async def upload(file: UploadFile):
+async def upload(file: UploadFile, collection: str = Config.DEFAULT_COLLECTION):
     """Endpoint to upload a file for processing by the assistant agent.
+    The file is streamed to disk and files with the same content as an already ingested document are skipped.
 
     Args:
         file (UploadFile): The file to be uploaded.
+        collection (str, optional): Id of the document collection (e.g. course) the file belongs to.
         
     Raises:
-        HTTPException: If an error occurs during file upload or writing.
+        HTTPException: If the collection id or file name is invalid, the file is too large
+            or an error occurs during file upload or writing.
         
     Returns:
-        dict: A dictionary containing the status of the upload and the file path.
+        dict: A dictionary containing the status of the upload ('success' or 'duplicate'), the file path and,
+            for new files, the id of the ingestion job indexing the file in the background.
     """
-    logger.info(f"Received file upload: {file.filename}")
-    file_path = f"{Config.UPLOAD_DIR}/{file.filename}"
+    services = _services()
+    logger.info(f"Received file upload: {file.filename} (collection: {collection})")
+    if not validate_collection_id(collection):
+        raise HTTPException(
+            status_code=400,
+            detail="Collection id must consist of 1 to 64 letters, digits, '_' or '-'!"
+        )
+
+    filename = Path(file.filename or "").name
+    if not filename or filename.startswith("."):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file name"
+        )
+        
+    upload_dir = services.collections.documents_path_for(collection)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    file_path = upload_dir / filename
+    # Partial uploads use a suffix the vectorstore ignores, so an ingestion job never picks up a half-written file.
+    part_path = upload_dir / f".{filename}.{uuid.uuid4().hex}.part"
     try:
-        with open(file_path, "wb") as f:
-            f.write(file.file.read())
+        digest = await _stream_to_file(file, part_path, Config.MAX_UPLOAD_MB * 1024 * 1024)
+        duplicate = await asyncio.to_thread(services.collections.get(collection).find_document, digest)
+        if duplicate is None:
+            await asyncio.to_thread(os.replace, part_path, file_path)
+    except HTTPException:
+        logger.error("File upload rejected")
+        raise
     except Exception as e:
         logger.error("Error while writing the file")
         raise HTTPException(
             status_code=400,
             detail=f"Error while writing the file {str(e)}"
         )
-        
-    logger.info("File upload successful")
-    return {"status": "success", "file_path" : file_path}
+    finally:
+        await asyncio.to_thread(part_path.unlink, missing_ok=True)
+
+    if duplicate is not None:
+        logger.info(f"File already ingested as {duplicate.name}, skipping")
+        return {"status": "duplicate", "file_path": str(duplicate), "collection": collection}
+
+    job = services.ingestion_queue.submit(collection)
+    logger.info(f"File upload successful, ingestion job: {job.id}")
+    return {"status": "success", "file_path" : str(file_path), "collection": collection, "job_id": job.id}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> IngestionJobResponse:
+    """Endpoint to check the status and progress of a background ingestion job.
+
+    Args:
+        job_id (str): Id of the job returned by the upload endpoint.
+
+    Raises:
+        HTTPException: If there is no job with the given id.
+
+    Returns:
+        IngestionJobResponse: The status of the job.
+    """
+    job = _services().ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job {job_id} not found"
+        )
+    return IngestionJobResponse(**job.to_dict())
+
+def _lookup_answer(services: Services, query_message: QueryMessage) -> Tuple[Optional[str], str]:
+    """Looks up the answer of a similar previous question asked about the same version of the collection's index.
+    Questions asking for fresh exam questions always miss.
+
+    Args:
+        services (Services): The warmed up components.
+        query_message (QueryMessage): The query message containing the user's question.
+
+    Returns:
+        Tuple[Optional[str], str]: The cached answer (None on a miss) and the current index version of the collection.
+    """
+    index_version = services.collections.get(query_message.collection).index_version
+    if services.answer_cache is None or query_message.fresh:
+        return None, index_version
+
+    cached = services.answer_cache.get(query_message.query, query_message.collection, index_version)
+    if cached is None:
+        return None, index_version
+
+    answer, similarity = cached
+    logger.info(f"Answering from the cache of a similar question (similarity {similarity:.3f})")
+    return answer, index_version
+
+
+def _check_collection(services: Services, collection: str):
+    """Rejects queries about an invalid collection id or a collection that was never created, without creating it.
+
+    Raises:
+        HTTPException: If the collection id is invalid (400) or the collection doesn't exist (404).
+    """
+    if not validate_collection_id(collection):
+        raise HTTPException(status_code=400, detail="Collection id must consist of 1 to 64 letters, digits, '_' or '-'!")
+
+    if not services.collections.exists(collection):
+        raise HTTPException(status_code=404, detail=f"Collection {collection} not found")
+
+
+def _store_answer(services: Services, query_message: QueryMessage, index_version: str, answer: str):
+    if services.answer_cache is not None and answer:
+        services.answer_cache.put(query_message.query, query_message.collection, index_version, answer)
+
 
 @app.post("/query")
 async def query(query_message: QueryMessage) -> QueryResponse:
     """Endpoint to process a query message and return a response.
+    The answer of a similar enough previous question is reused while the collection's index doesn't change.
 
     Args:
         query_message (QueryMessage): The query message containing the user's question.
 
     Raises:
-        HTTPException: If an error occurs during processing.
+        HTTPException: If the collection doesn't exist or an error occurs during processing.
 
     Returns:
         QueryResponse: The response containing the answer to the query.
     """
+    services = _services()
     logger.info("Incoming query...")
+    _check_collection(services, query_message.collection)
     try:
-        response = await assistant.ainvoke(query_message.query)
+        # Embedding the question is CPU-bound, so the lookup runs in a worker thread.
+        cached, index_version = await asyncio.to_thread(_lookup_answer, services, query_message)
+        if cached is not None:
+            return QueryResponse(answer=cached, cached=True)
+
+        response = await services.assistant.ainvoke(query_message.query, query_message.collection, query_message.fresh)
+        await asyncio.to_thread(_store_answer, services, query_message, index_version, response)
         logger.info("Returning answer")
         return QueryResponse(answer=response)
     except Exception as e:
@@ -75,4 +357,49 @@ async def query(query_message: QueryMessage) -> QueryResponse:
         raise HTTPException(
             status_code=400,
             detail=f"Retrieval failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@app.post("/query/stream")
+async def query_stream(query_message: QueryMessage) -> StreamingResponse:
+    """Endpoint to process a query message and stream the answer as Server-Sent Events.
+    Every event is named after its type and carries the JSON encoded event of AssistantAgent.astream, so the client
+    can show the planned tasks, the summary tokens and every finished task section before the whole answer is ready.
+    An answer reused from the cache of similar questions is sent as a single 'result' event with 'cached' set.
+    Errors raised after the stream started are sent as an 'error' event.
+
+    Args:
+        query_message (QueryMessage): The query message containing the user's question.
+
+    Raises:
+        HTTPException: If the question or the collection id is not valid, the collection doesn't exist
+            or the service is not ready.
+
+    Returns:
+        StreamingResponse: The 'text/event-stream' response.
+    """
+    services = _services()
+    if not validate_string(query_message.query):
+        raise HTTPException(status_code=400, detail="Question must be a valid nonempty string!")
+
+    _check_collection(services, query_message.collection)
+
+    async def events():
+        logger.info("Incoming streamed query...")
+        try:
+            cached, index_version = await asyncio.to_thread(_lookup_answer, services, query_message)
+            if cached is not None:
+                yield f"event: result\ndata: {json.dumps({'type': 'result', 'answer': cached, 'cached': True})}\n\n"
+                return
+
+            async for event in services.assistant.astream(query_message.query, query_message.collection, query_message.fresh):
+                if event['type'] == 'result':
+                    await asyncio.to_thread(_store_answer, services, query_message, index_version, event['answer'])
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            logger.info("Answer streamed")
+        except Exception as e:
+            logger.error(f"Error occured: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': f'Retrieval failed: {e}'})}\n\n"
+
+    # Proxies mustn't buffer the stream, otherwise the client still waits for the whole answer.
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
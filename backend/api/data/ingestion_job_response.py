@@ -0,0 +1,31 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+class IngestionJobResponse(BaseModel):
+    """Model representing the status of a background ingestion job.
+
+    Attributes:
+        job_id (str): Unique id of the job.
+        collection (str): Id of the ingested document collection.
+        status (str): One of 'queued', 'running', 'succeeded' or 'failed'.
+        documents_done (int): Number of processed documents.
+        documents_total (int): Number of documents to (re)index, known once the job is running.
+        progress (float): Fraction of the job that is done, between 0 and 1.
+        updated (bool): Whether the job updated the vectorstore.
+        error (str, optional): Error message of a failed job.
+        created_at (float): UNIX time of job creation.
+        started_at (float, optional): UNIX time the job started running.
+        finished_at (float, optional): UNIX time the job finished.
+    """
+    job_id: str
+    collection: str
+    status: str
+    documents_done: int
+    documents_total: int
+    progress: float
+    updated: bool
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
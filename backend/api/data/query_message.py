@@ -1,10 +1,16 @@
 from pydantic import BaseModel
 
+from backend.config import Config
+
 class QueryMessage(BaseModel):
     """Model representing a query message sent by the user.
     This model is used to encapsulate the query string that the user wants to ask.
 
     Attributes:
         query (str): The question or query string that the user wants to ask. 
+        collection (str): Id of the document collection (e.g. course) searched for context. Defaults to Config.DEFAULT_COLLECTION.
+        fresh (bool): Whether exam questions are generated anew instead of reused from the cache. Defaults to False.
     """
-    query: str
\ No newline at end of file
+    query: str
+    collection: str = Config.DEFAULT_COLLECTION
+    fresh: bool = False
\ No newline at end of file
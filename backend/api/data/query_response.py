@@ -6,5 +6,7 @@ class QueryResponse(BaseModel):
 
     Attributes:
         answer (str): The answer to the user's query, which may include information retrieved from various sources or generated by the assistant agent.
+        cached (bool): Whether the answer of a similar previous question was reused. Defaults to False.
     """
     answer: str
+    cached: bool = False
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import TYPE_CHECKING, Optional, Dict
+
+if TYPE_CHECKING:
+    from backend.api.agents.RAG.collection_registry import CollectionRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class IngestionJob:
+    """
+    Ingestion of the documents of a single collection into its vectorstore.
+
+    Attributes:
+        collection (str): id of the ingested collection
+        id (str): unique job id
+        status (JobStatus): current status of the job
+        documents_done (int): number of processed documents
+        documents_total (int): number of documents to (re)index, known once the job is running
+        updated (bool): whether the vectorstore was updated by the job
+        error (str, optional): error message of a failed job
+        created_at (float): UNIX time of job creation
+        started_at (float, optional): UNIX time the job started running
+        finished_at (float, optional): UNIX time the job finished
+    """
+    collection: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    documents_done: int = 0
+    documents_total: int = 0
+    updated: bool = False
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == JobStatus.SUCCEEDED:
+            return 1.0
+        return self.documents_done / self.documents_total if self.documents_total else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "collection": self.collection,
+            "status": self.status.value,
+            "documents_done": self.documents_done,
+            "documents_total": self.documents_total,
+            "progress": self.progress,
+            "updated": self.updated,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+@dataclass
+class IngestionQueue:
+    """
+    Queue of ingestion jobs processed one at a time by a background worker, so that uploads return immediately
+    and queries keep being served from the last good index while the new one is built.
+    A job submitted for a collection that already has a queued job is merged into it.
+
+    Attributes:
+        collections (CollectionRegistry): registry providing the vectorstores of the collections
+        max_history (int): maximum number of finished jobs kept for status lookups. Default: 1000
+    """
+    collections: "CollectionRegistry"
+    max_history: int = 1000
+    __jobs: "OrderedDict[str, IngestionJob]" = field(default_factory=OrderedDict, init=False)
+    __queued: Dict[str, IngestionJob] = field(default_factory=dict, init=False)
+    __queue: Optional[asyncio.Queue] = field(default=None, init=False)
+    __worker: Optional[asyncio.Task] = field(default=None, init=False)
+    __running: Optional[IngestionJob] = field(default=None, init=False)
+    __stopping: bool = field(default=False, init=False)
+
+    def __post_init__(self):
+        if not isinstance(self.max_history, int) or self.max_history <= 0:
+            raise ValueError("Job history size must be over 0!")
+
+    def start(self):
+        """Starts the background worker, must be called from a running event loop."""
+        if self.__worker is None:
+            self.__queue = asyncio.Queue()
+            self.__worker = asyncio.create_task(self.__run())
+
+    async def stop(self):
+        """Stops the background worker. A running job is finished first, since its refresh thread can't be
+        interrupted and would keep writing the vectorstore. Queued jobs are left unprocessed."""
+        if self.__worker is not None:
+            self.__stopping = True
+            if self.__running is None:
+                self.__worker.cancel()
+            else:
+                logger.info(f"Waiting for ingestion job {self.__running.id} to finish")
+            with suppress(asyncio.CancelledError):
+                await self.__worker
+            self.__worker = None
+            self.__stopping = False
+
+    def submit(self, collection: str) -> IngestionJob:
+        """Enqueues ingestion of the collection.
+
+        Args:
+            collection (str): id of the collection
+
+        Raises:
+            ValueError: Ingestion queue must be started before submitting jobs!
+
+        Returns:
+            IngestionJob: the queued job, possibly shared with an earlier submission for the same collection
+        """
+        if self.__queue is None:
+            raise ValueError("Ingestion queue must be started before submitting jobs!")
+
+        job = self.__queued.get(collection)
+        if job is not None:
+            return job
+
+        job = IngestionJob(collection)
+        self.__queued[collection] = job
+        self.__jobs[job.id] = job
+        self.__trim_history()
+        self.__queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.__jobs.get(job_id)
+
+    def __trim_history(self):
+        finished = [job_id for job_id, job in self.__jobs.items() if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)]
+        for job_id in finished[:max(0, len(self.__jobs) - self.max_history)]:
+            del self.__jobs[job_id]
+
+    async def __run(self):
+        while not self.__stopping:
+            job = await self.__queue.get()
+            self.__running = job
+            try:
+                await self.__process(job)
+            finally:
+                self.__running = None
+                self.__queue.task_done()
+
+    async def __process(self, job: IngestionJob):
+        self.__queued.pop(job.collection, None)
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        logger.info(f"Ingestion job {job.id} started (collection: {job.collection})")
+
+        def progress(done: int, total: int):
+            job.documents_done = done
+            job.documents_total = total
+
+        try:
+            provider = self.collections.get(job.collection)
+            job.updated = await asyncio.to_thread(provider.refresh, progress)
+            job.status = JobStatus.SUCCEEDED
+            logger.info(f"Ingestion job {job.id} finished")
+        except asyncio.CancelledError:
+            job.status = JobStatus.FAILED
+            job.error = "Ingestion was cancelled"
+            raise
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            logger.exception(f"Ingestion job {job.id} failed")
+        finally:
+            job.finished_at = time.time()
@@ -1,15 +1,115 @@
-import uuid, aiohttp
+import asyncio
+import json
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
 
 class MCPClient:
-    def __init__(self, url):
+    """Client of the MCP server's JSON-RPC API.
+    Requests share one pooled keep-alive session per event loop, which is created on first use and should be closed
+    with close() from the same loop, e.g. when the application shuts down or a synchronous invocation finishes.
+    """
+    __RETRY_STATUSES = {502, 503, 504}
+
+    def __init__(
+        self,
+        url,
+        timeout: float = Config.MCP_TIMEOUT,
+        retries: int = Config.MCP_RETRIES,
+        backoff: float = Config.MCP_BACKOFF,
+        pool_size: int = Config.MCP_POOL_SIZE
+    ):
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError("Timeout must be over 0!")
+
+        if not isinstance(retries, int) or retries < 0:
+            raise ValueError("Number of retries mustn't be negative!")
+
+        if not isinstance(backoff, (int, float)) or backoff < 0:
+            raise ValueError("Backoff mustn't be negative!")
+
+        if not isinstance(pool_size, int) or pool_size <= 0:
+            raise ValueError("Connection pool size must be over 0!")
+
         self.url = url
-    
-    async def _rpc(self, method: str, params:dict=None) -> str | dict | list[dict]:
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        # A session is bound to the event loop it was created in, e.g. every synchronous agent invocation
+        # runs in a new loop, so each loop gets its own session.
+        self.__sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    async def __aenter__(self) -> "MCPClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # Sessions of loops closed without calling close() can't be used anymore.
+        for closed_loop in [other for other in self.__sessions if other.is_closed()]:
+            del self.__sessions[closed_loop]
+        session = self.__sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+            self.__sessions[loop] = session
+        return session
+
+    async def close(self):
+        """Closes the pooled session of the running event loop and its connections."""
+        session = self.__sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def _post(self, payload: dict | list, timeout: Optional[float] = None) -> str | dict | list:
+        """Internal method posting a JSON-RPC payload, retrying failed connections, timeouts and unavailable
+        server responses with exponential backoff.
+
+        Args:
+            payload (dict | list): JSON-RPC request or batch of requests.
+            timeout (float, optional): Deadline of a single attempt in seconds. Defaults to the client's timeout.
+
+        Raises:
+            aiohttp.ClientError: If the last attempt failed to connect or the server stayed unavailable.
+            asyncio.TimeoutError: If the last attempt timed out.
+
+        Returns:
+            str | dict | list: The decoded response of the MCP server, or its raw text if it isn't JSON.
+        """
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.__get_session().post(self.url, json=payload, timeout=client_timeout) as resp:
+                    if resp.status in self.__RETRY_STATUSES:
+                        raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status, message=resp.reason or "")
+                    text = await resp.text()
+                try:
+                    return json.loads(text)
+                except json.JSONDecodeError:
+                    return text
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"MCP request failed ({e.__class__.__name__}: {e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _rpc(self, method: str, params:dict=None, timeout: Optional[float] = None) -> str | dict | list[dict]:
         """Internal method to perform a JSON-RPC call to the MCP server."
 
         Args:
             method (str): Description of the method to call.
             params (str, optional): Parameters to pass to the method. Defaults to None.
+            timeout (float, optional): Deadline of a single attempt in seconds. Defaults to the client's timeout.
 
         Returns:
             str | dict | list[dict]: The response from the MCP server, which can be a string, a dictionary, or a list of dictionaries.
@@ -20,18 +120,11 @@ class MCPClient:
             "method": method,
             "params": params or {}
         }
-        async with aiohttp.ClientSession() as sess:
-            async with sess.post(self.url, json=payload) as resp:
-                text = await resp.text()
-                try:
-                    data = await resp.json()
-                except:
-                    data = text
-        return data
+        return await self._post(payload, timeout)
 
     async def list_tools(self) -> list[dict]:
         """List all available tools on the MCP server.
-        
+
         Returns:
             list[dict]: A list of tools, their descriptions and parameters that are available on the MCP server.
         """
@@ -39,14 +132,15 @@ class MCPClient:
         if isinstance(resp, dict) and "result" in resp:
             return resp["result"]
         raise RuntimeError(f"No result in listTools: {resp!r}")
-        
-    async def call_tool(self, name: str, args) -> str:
+
+    async def call_tool(self, name: str, args, timeout: Optional[float] = None) -> str:
         """Call a tool on the MCP server with the given name and arguments.
         This method sends a request to the MCP server to execute a specific tool with the provided arguments.
 
         Args:
             name (str): The name of the tool to call.
             args (dict): A dictionary of arguments to pass to the tool.
+            timeout (float, optional): Deadline of a single attempt in seconds. Defaults to the client's timeout.
 
         Raises:
             RuntimeError: If the response does not contain a "result" key, indicating that the tool call failed or was not executed properly.
@@ -54,8 +148,51 @@ class MCPClient:
         Returns:
             str: The result of the tool call, as returned by the MCP server.
         """
-        resp = await self._rpc("callTool", {"tool": name, "args": args})
+        resp = await self._rpc("callTool", {"tool": name, "args": args}, timeout)
         if isinstance(resp, dict) and "result" in resp:
             return resp["result"]
         raise RuntimeError(f"No result in callTool: {resp!r}")
 
+    async def call_tools(self, calls: List[Tuple[str, dict]], timeout: Optional[float] = None) -> List[str]:
+        """Call several tools on the MCP server in a single JSON-RPC batch request, sharing one round trip.
+        Calls without a result in the batch response are retried individually, so the calls that succeeded
+        (and their side effects) are not repeated.
+
+        Args:
+            calls (List[Tuple[str, dict]]): Names and arguments of the tools to call.
+            timeout (float, optional): Deadline of a single attempt in seconds. Defaults to the client's timeout.
+
+        Raises:
+            RuntimeError: If a call retried individually still does not return a "result" key.
+
+        Returns:
+            List[str]: The results of the tool calls, in the order of the given calls.
+        """
+        if not calls:
+            return []
+
+        payload = [
+            {"jsonrpc": "2.0", "id": str(uuid.uuid4()), "method": "callTool", "params": {"tool": name, "args": args}}
+            for name, args in calls
+        ]
+        resp = await self._post(payload, timeout)
+        if not isinstance(resp, list):
+            raise RuntimeError(f"No results in callTool batch: {resp!r}")
+
+        # Responses of a batch may come in any order, they are matched to the requests by id.
+        responses = {item.get("id"): item for item in resp if isinstance(item, dict)}
+        results = []
+        failed = []
+        for position, request in enumerate(payload):
+            item = responses.get(request["id"])
+            if isinstance(item, dict) and "result" in item:
+                results.append(item["result"])
+            else:
+                logger.warning(f"No result in callTool batch item {request['params']['tool']!r}: {item!r}, retrying it alone")
+                results.append(None)
+                failed.append(position)
+
+        retried = await asyncio.gather(*(self.call_tool(*calls[position], timeout) for position in failed))
+        for position, result in zip(failed, retried):
+            results[position] = result
+        return results
@@ -0,0 +1,59 @@
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupStatus(str, Enum):
+    STARTING = "starting"
+    READY = "ready"
+    FAILED = "failed"
+
+
+@dataclass
+class StartupTracker:
+    """
+    Tracks the background warm-up of the API, i.e. its status and how long every startup phase took.
+
+    Attributes:
+        status (StartupStatus): status of the warm-up
+        phases (Dict[str, float]): duration of the finished phases in seconds, in the order they ran
+        error (str, optional): error that failed the warm-up
+    """
+    status: StartupStatus = StartupStatus.STARTING
+    phases: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+    __start: float = field(default_factory=time.perf_counter, init=False)
+
+    @property
+    def ready(self) -> bool:
+        return self.status == StartupStatus.READY
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measures and logs the duration of a startup phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            logger.info(f"Startup phase '{name}' took {self.phases[name]:.2f}s")
+
+    def succeed(self):
+        self.status = StartupStatus.READY
+        logger.info(f"API ready {time.perf_counter() - self.__start:.2f}s after start")
+
+    def fail(self, error: Exception):
+        self.status = StartupStatus.FAILED
+        self.error = f"{error.__class__.__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status.value,
+            "phases": dict(self.phases),
+            "error": self.error,
+        }
@@ -1,16 +1,63 @@
 import os
 
+from dotenv import load_dotenv
+
+# Settings are read when the module is imported, so .env must be loaded first.
+load_dotenv()
+
 class Config:
     """Configuration class for the Student Assistant application.
     This class holds configuration settings such as model names, API keys, and directory paths.
     """
     EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+    EMBED_QUANTIZE = os.getenv("EMBED_QUANTIZE", "false").lower() == "true"
+    EMBED_THREADS = int(os.getenv("EMBED_THREADS")) if os.getenv("EMBED_THREADS") else None
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+    EMBED_PARITY_CHECK = os.getenv("EMBED_PARITY_CHECK", "false").lower() == "true"
     LLM_MODEL = "gpt-4o-mini"
     VECTOR_DB_DIR = "./storage/vector_db"
     UPLOAD_DIR = "./storage/uploads"
+    MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "100"))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1 << 20)))
+    DEFAULT_COLLECTION = "default"
+    MAX_LOADED_COLLECTIONS = int(os.getenv("MAX_LOADED_COLLECTIONS", "8"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    INGEST_BATCH_MAX_MB = int(os.getenv("INGEST_BATCH_MAX_MB", "64"))
+    VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+    VECTOR_INDEX_FLAT_THRESHOLD = int(os.getenv("VECTOR_INDEX_FLAT_THRESHOLD", "10000"))
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL")) if os.getenv("QUERY_CACHE_TTL") else None
+    RAG_MODE = os.getenv("RAG_MODE", "agent")
+    CONTEXT_DECISION_MODE = os.getenv("CONTEXT_DECISION_MODE", "per_task")
+    CONTEXT_ACCEPT_SCORE = float(os.getenv("CONTEXT_ACCEPT_SCORE")) if os.getenv("CONTEXT_ACCEPT_SCORE") else None
+    CONTEXT_REJECT_SCORE = float(os.getenv("CONTEXT_REJECT_SCORE")) if os.getenv("CONTEXT_REJECT_SCORE") else None
+    MAX_TASK_CONCURRENCY = int(os.getenv("MAX_TASK_CONCURRENCY", "4"))
+    ANSWER_CACHE = os.getenv("ANSWER_CACHE", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     MCP_PORT = int(os.getenv("MCP_PORT", "4001"))
     MCP_HOST = os.getenv("MCP_HOST", "localhost")
+    MCP_TIMEOUT = float(os.getenv("MCP_TIMEOUT", "120"))
+    MCP_RETRIES = int(os.getenv("MCP_RETRIES", "2"))
+    MCP_BACKOFF = float(os.getenv("MCP_BACKOFF", "0.5"))
+    MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "20"))
+    MCP_MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "8"))
+    MCP_MAX_QUEUE = int(os.getenv("MCP_MAX_QUEUE", "64"))
+    MCP_SHUTDOWN_TIMEOUT = float(os.getenv("MCP_SHUTDOWN_TIMEOUT", "30"))
+    MCP_CACHE_PATH = os.getenv("MCP_CACHE_PATH", "./storage/cache/mcp_cache.sqlite")
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000"))
+    EXAM_CACHE_TTL = float(os.getenv("EXAM_CACHE_TTL", str(24 * 3600)))
+    EXAM_CACHE_MAX_ENTRIES = int(os.getenv("EXAM_CACHE_MAX_ENTRIES", "2000"))
+    LLM_CACHE = os.getenv("LLM_CACHE", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./storage/cache/llm_cache.sqlite")
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
     API_PORT = int(os.getenv("API_PORT", "8000"))
     API_HOST = os.getenv("API_HOST", "localhost")
     FRONTEND_PORT = int(os.getenv("FRONTEND_PORT", "8501"))
@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages.ai import AIMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph.graph import CompiledGraph
 
 from backend.core.validation_methods import validate_llm, validate_string
@@ -30,11 +31,12 @@ class BaseAgent(ABC):
         """
         pass
     
-    def invoke(self, question: str) -> Optional[str | List[str | Dict]]:
+    def invoke(self, question: str, config: Optional[RunnableConfig] = None) -> Optional[str | List[str | Dict]]:
         """Invoke the agent with a question and return the response.
 
         Args:
             question (str): The question to ask the agent.
+            config (RunnableConfig, optional): Config passed to the agent's graph. Defaults to None.
 
         Raises:
             ValueError: If the question is not a valid nonempty string.
@@ -45,14 +47,15 @@ class BaseAgent(ABC):
         if not validate_string(question):
             raise ValueError("Question must be a valid nonempty string!")
         
-        response = self.graph.invoke({'messages': [('user', question)]})
+        response = self.graph.invoke({'messages': [('user', question)]}, config=config)
         return next((msg.content for msg in response['messages'] if isinstance(msg, AIMessage) and msg.content), None)
     
-    async def ainvoke(self, question: str) -> Optional[str | List[str | Dict]]:
+    async def ainvoke(self, question: str, config: Optional[RunnableConfig] = None) -> Optional[str | List[str | Dict]]:
         """Asynchronously invoke the agent with a question and return the response.
 
         Args:
             question (str): The question to ask the agent.
+            config (RunnableConfig, optional): Config passed to the agent's graph. Defaults to None.
 
         Raises:
             ValueError: If the question is not a valid nonempty string.
@@ -63,5 +66,36 @@ class BaseAgent(ABC):
         if not validate_string(question):
             raise ValueError("Question must be a valid nonempty string!")
         
-        response = await self.graph.ainvoke({'messages': [('user', question)]})
-        return next((msg.content for msg in response['messages'] if isinstance(msg, AIMessage) and msg.content), None)
\ No newline at end of file
+        response = await self.graph.ainvoke({'messages': [('user', question)]}, config=config)
+        return next((msg.content for msg in response['messages'] if isinstance(msg, AIMessage) and msg.content), None)
+    
+    async def astream(self, question: str, config: Optional[RunnableConfig] = None) -> AsyncIterator[str]:
+        """Asynchronously invoke the agent with a question and yield the text of the response as the LLM generates it.
+        Only the text of the agent's answers is yielded, tool calls and tool results are skipped. Tokens are taken from
+        the callback events of the LLM, so streaming also works when the agent runs inside a node of another graph.
+
+        Args:
+            question (str): The question to ask the agent.
+            config (RunnableConfig, optional): Config passed to the agent's graph. Defaults to None.
+
+        Raises:
+            ValueError: If the question is not a valid nonempty string.
+
+        Yields:
+            str: The next chunk of the response text.
+        """
+        if not validate_string(question):
+            raise ValueError("Question must be a valid nonempty string!")
+        
+        streamed_runs = set()
+        async for event in self.graph.astream_events({'messages': [('user', question)]}, config=config, version="v2"):
+            if event["event"] == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if isinstance(content, str) and content:
+                    streamed_runs.add(event["run_id"])
+                    yield content
+            elif event["event"] == "on_chat_model_end" and event["run_id"] not in streamed_runs:
+                # Models without streaming support only report the whole message once it's generated.
+                message = event["data"]["output"]
+                if isinstance(message, AIMessage) and isinstance(message.content, str) and message.content and not message.tool_calls:
+                    yield message.content
@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def validate_concurrency(max_concurrency: int) -> bool:
+    return isinstance(max_concurrency, int) and not isinstance(max_concurrency, bool) and max_concurrency > 0
+
+
+async def amap_concurrently(func: Callable[[T], Awaitable[R]], items: Dict[K, T], max_concurrency: int) -> Dict[K, R]:
+    """Awaits the coroutine function for every item, running at most max_concurrency of them at once.
+
+    Args:
+        func (Callable[[T], Awaitable[R]]): coroutine function called for every item
+        items (Dict[K, T]): items keyed by their id
+        max_concurrency (int): maximum number of concurrent calls
+
+    Raises:
+        ValueError: Concurrency limit must be over 0!
+
+    Returns:
+        Dict[K, R]: results keyed by the item ids, in the order of the given items
+    """
+    if not validate_concurrency(max_concurrency):
+        raise ValueError("Concurrency limit must be over 0!")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    results = await asyncio.gather(*(run(item) for item in items.values()))
+    return dict(zip(items, results))
@@ -0,0 +1,114 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class DiskCache:
+    """
+    Persistent key-value cache stored in SQLite, shared by all processes using the same file.
+    Entries expire after ttl seconds and the least recently used ones are evicted once the namespace holds
+    more than max_entries entries. Keys are stored hashed, values must be strings.
+
+    Attributes:
+        cache_path (Path): path to the SQLite cache file
+        namespace (str): name separating entries of different caches in the same file. Default: "default"
+        max_entries (int): maximum number of entries in the namespace. Default: 10000
+        ttl (float, optional): number of seconds after which an entry expires. Default: None (entries don't expire)
+        hits (int): number of successful lookups
+        misses (int): number of lookups of missing or expired entries
+    """
+    cache_path: Path
+    namespace: str = "default"
+    max_entries: int = 10000
+    ttl: Optional[float] = None
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    __lock: Any = field(default_factory=threading.Lock, init=False)
+
+    def __post_init__(self):
+        if not isinstance(self.max_entries, int) or self.max_entries <= 0:
+            raise ValueError("Cache size must be over 0!")
+
+        if self.ttl is not None and (not isinstance(self.ttl, (int, float)) or self.ttl <= 0):
+            raise ValueError("Cache TTL must be over 0 if provided!")
+
+        if not isinstance(self.cache_path, Path):
+            self.cache_path = Path(self.cache_path)
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.__connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key_hash TEXT NOT NULL, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed)")
+
+    def __connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.cache_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def __key_hash(key: str) -> str:
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def __len__(self) -> int:
+        with closing(self.__connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        key_hash = self.__key_hash(key)
+        with self.__lock, closing(self.__connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value, created FROM cache WHERE namespace = ? AND key_hash = ?", (self.namespace, key_hash)
+            ).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    conn.execute("DELETE FROM cache WHERE namespace = ? AND key_hash = ?", (self.namespace, key_hash))
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE cache SET accessed = ? WHERE namespace = ? AND key_hash = ?", (now, self.namespace, key_hash)
+            )
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self.__lock, closing(self.__connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key_hash, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, self.__key_hash(key), value, now, now)
+            )
+            if self.ttl is not None:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND created < ?", (self.namespace, now - self.ttl))
+            size = conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+            if size > self.max_entries:
+                conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key_hash IN "
+                    "(SELECT key_hash FROM cache WHERE namespace = ? ORDER BY accessed LIMIT ?)",
+                    (self.namespace, self.namespace, size - self.max_entries)
+                )
+
+    def clear(self):
+        with self.__lock, closing(self.__connect()) as conn, conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,82 @@
+import inspect
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from langchain_core._api import suppress_langchain_beta_warning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation, GenerationChunk
+
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Only the generations written by update are deserialized, older langchain_core versions don't restrict loads.
+CACHED_OBJECTS = [Generation, GenerationChunk, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk]
+LOADS_KWARGS = {"allowed_objects": CACHED_OBJECTS} if "allowed_objects" in inspect.signature(loads).parameters else {}
+
+
+class DiskLLMCache(BaseCache):
+    """
+    Exact-match cache of LLM generations stored in a DiskCache, so repeated identical calls are answered without
+    calling the model, also across processes using the same cache file. Entries are keyed by the prompt (the serialized
+    messages without their ids) and the LLM string, which identifies the model, its parameters (e.g. temperature)
+    and the bound tools.
+    Cached messages carry no usage metadata, as no tokens are spent on a hit.
+
+    Attributes:
+        cache (DiskCache): underlying persistent cache
+    """
+    def __init__(self, cache_path: Union[str, Path], max_entries: int = 10000, ttl: Optional[float] = None):
+        """
+        Args:
+            cache_path (Union[str, Path]): path to the SQLite cache file
+            max_entries (int, optional): maximum number of cached calls, least recently used ones are evicted. Defaults to 10000.
+            ttl (float, optional): number of seconds after which a cached call expires. Defaults to None (calls don't expire).
+        """
+        self.cache = DiskCache(Path(cache_path), namespace="llm", max_entries=max_entries, ttl=ttl)
+
+    @staticmethod
+    def __key(prompt: str, llm_string: str) -> str:
+        try:
+            messages = json.loads(prompt)
+        except json.JSONDecodeError:
+            return json.dumps([llm_string, prompt])
+
+        # Agent graphs give every message a random id, which would make every prompt unique.
+        for message in messages if isinstance(messages, list) else []:
+            if isinstance(message, dict) and isinstance(message.get("kwargs"), dict):
+                message["kwargs"].pop("id", None)
+        return json.dumps([llm_string, messages], sort_keys=True)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.cache.get(self.__key(prompt, llm_string))
+        if value is None:
+            return None
+
+        try:
+            with suppress_langchain_beta_warning():
+                generations = loads(value, **LOADS_KWARGS)
+        except Exception as e:
+            # E.g. an entry written by an incompatible langchain version, the call is simply made again.
+            logger.warning(f"Skipping unreadable LLM cache entry: {e}")
+            return None
+
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None and getattr(message, "usage_metadata", None):
+                message.usage_metadata = None
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        self.cache.put(self.__key(prompt, llm_string), dumps(list(return_val)))
+
+    def clear(self, **kwargs: Any):
+        self.cache.clear()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return self.cache.stats
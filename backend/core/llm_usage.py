@@ -0,0 +1,72 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+class LLMUsageTracker(BaseCallbackHandler):
+    """
+    Callback handler counting the LLM calls and tokens used while running a chain or an agent.
+
+    Attributes:
+        llm_calls (int): number of finished LLM calls
+        input_tokens (int): number of prompt tokens reported by the model
+        output_tokens (int): number of completion tokens reported by the model
+    """
+    def __init__(self):
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.__lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        with self.__lock:
+            self.llm_calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+
+@dataclass
+class UsageStats:
+    """
+    Accumulated latency and LLM usage of the invocations of an agent.
+
+    Attributes:
+        calls (int): number of invocations
+        latency (float): total latency of the invocations in seconds
+        llm_calls (int): total number of LLM calls
+        input_tokens (int): total number of prompt tokens
+        output_tokens (int): total number of completion tokens
+    """
+    calls: int = 0
+    latency: float = 0.0
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    __lock: Any = field(default_factory=threading.Lock, init=False)
+
+    def record(self, latency: float, tracker: LLMUsageTracker):
+        with self.__lock:
+            self.calls += 1
+            self.latency += latency
+            self.llm_calls += tracker.llm_calls
+            self.input_tokens += tracker.input_tokens
+            self.output_tokens += tracker.output_tokens
+
+    def as_dict(self) -> Dict[str, float]:
+        calls = self.calls or 1
+        return {
+            "calls": self.calls,
+            "avg_latency": self.latency / calls,
+            "avg_llm_calls": self.llm_calls / calls,
+            "avg_input_tokens": self.input_tokens / calls,
+            "avg_output_tokens": self.output_tokens / calls,
+        }
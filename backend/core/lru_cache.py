@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Optional, Dict
+
+
+@dataclass
+class LRUCache:
+    """
+    Thread-safe in-memory least recently used cache with optional time to live of the entries.
+
+    Attributes:
+        max_size (int): maximum number of entries. Default: 1024
+        ttl (float, optional): number of seconds after which an entry expires. Default: None (entries don't expire)
+        hits (int): number of successful lookups
+        misses (int): number of lookups of missing or expired entries
+    """
+    max_size: int = 1024
+    ttl: Optional[float] = None
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    __entries: OrderedDict = field(default_factory=OrderedDict, init=False)
+    __lock: Any = field(default_factory=threading.Lock, init=False)
+
+    def __post_init__(self):
+        if not isinstance(self.max_size, int) or self.max_size <= 0:
+            raise ValueError("Cache size must be over 0!")
+
+        if self.ttl is not None and (not isinstance(self.ttl, (int, float)) or self.ttl <= 0):
+            raise ValueError("Cache TTL must be over 0 if provided!")
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or (self.ttl is not None and time.monotonic() - entry[1] > self.ttl):
+                if entry is not None:
+                    del self.__entries[key]
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        with self.__lock:
+            self.__entries[key] = (value, time.monotonic())
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.__entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,14 +1,56 @@
+import logging
 import os
 from abc import ABC
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional
 
-from langchain_huggingface.embeddings.huggingface import HuggingFaceEmbeddings
-from langchain_ollama import ChatOllama
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.embeddings import Embeddings
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from .validation_methods import validate_string
 
+if TYPE_CHECKING:
+    # Imported when a model is created, loading them (and torch) takes seconds and not every process needs them.
+    from langchain_huggingface.embeddings.huggingface import HuggingFaceEmbeddings
+    from langchain_ollama import ChatOllama
+
+logger = logging.getLogger(__name__)
+
 OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+# Dynamically int8 quantized export published with the sentence-transformers models, runs on any AVX2 CPU.
+ONNX_QUANTIZED_FILE = "onnx/model_quint8_avx2.onnx"
+PARITY_TEXTS = [
+    "What is the time complexity of binary search?",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The French Revolution began in 1789 with the storming of the Bastille.",
+    "A linked list stores elements in nodes that point to the next node.",
+    "Newton's second law states that force equals mass times acceleration.",
+]
+
+
+def embedding_parity(candidate: Embeddings, reference: Embeddings, texts: Optional[List[str]] = None) -> Dict[str, float]:
+    """Compares the vectors of an optimized (e.g. ONNX or quantized) embedding model with the vectors of its reference model.
+
+    Args:
+        candidate (Embeddings): checked embedding model
+        reference (Embeddings): reference embedding model
+        texts (List[str], optional): compared texts. Defaults to PARITY_TEXTS.
+
+    Returns:
+        Dict[str, float]: mean and minimal cosine similarity of the vectors of the same text and the maximal drift (1 - minimal similarity)
+    """
+    texts = texts or PARITY_TEXTS
+    candidate_vectors = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    reference_vectors = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    candidate_vectors /= np.linalg.norm(candidate_vectors, axis=1, keepdims=True)
+    reference_vectors /= np.linalg.norm(reference_vectors, axis=1, keepdims=True)
+    similarities = np.sum(candidate_vectors * reference_vectors, axis=1)
+    return {
+        "mean_cosine": float(similarities.mean()),
+        "min_cosine": float(similarities.min()),
+        "max_drift": float(1 - similarities.min()),
+    }
 
 
 class LLMFactory(ABC):
@@ -17,12 +59,14 @@ class LLMFactory(ABC):
         return isinstance(temperature, (float, int)) and (temperature >= 0 and temperature <= 1)
     
     @staticmethod
-    def openai(model: Optional[str] = "gpt-4o-mini", temperature: float = 0) -> ChatOpenAI:
+    def openai(model: Optional[str] = "gpt-4o-mini", temperature: float = 0, cache: Optional[BaseCache] = None) -> ChatOpenAI:
         """Provides an OpenAI LLM model according to given parameters.
 
         Args:
             model (str, optional): model for LLM. Defaults to "gpt-4o-mini".
             temperature (float, optional): base temperature of the LLM. Defaults to 0.
+            cache (BaseCache, optional): cache of the LLM calls, e.g. a shared DiskLLMCache. Meant for deterministic
+                (zero temperature) models. Defaults to None (calls aren't cached).
 
         Raises:
             ValueError: No OPENAI_API_KEY provided in .env!
@@ -43,15 +87,17 @@ class LLMFactory(ABC):
         if not LLMFactory.__validateTemperature(temperature):
             raise ValueError("Temperature must be in range [0, 1]!")
         
-        return ChatOpenAI(api_key=openai_api_key, model=model, temperature=temperature)
+        return ChatOpenAI(api_key=openai_api_key, model=model, temperature=temperature, cache=cache)
     
     @staticmethod
-    def ollama(model: str = "llama3.2", temperature: float = 0) -> ChatOllama:
+    def ollama(model: str = "llama3.2", temperature: float = 0, cache: Optional[BaseCache] = None) -> "ChatOllama":
         """Provides an Ollama LLM model according to the given parameters.
 
         Args:
             model (str, optional): model for LLM. Defaults to "llama3.2".
             temperature (float, optional): base temperature of the LLM. Defaults to 0.
+            cache (BaseCache, optional): cache of the LLM calls, e.g. a shared DiskLLMCache. Meant for deterministic
+                (zero temperature) models. Defaults to None (calls aren't cached).
 
         Raises:
             ValueError: Model name must be a nonempty string!
@@ -66,7 +112,9 @@ class LLMFactory(ABC):
         if not LLMFactory.__validateTemperature(temperature):
             raise ValueError("Temperature must be in range [0, 1]!")
         
-        return ChatOllama(model=model, temperature=temperature)
+        from langchain_ollama import ChatOllama
+
+        return ChatOllama(model=model, temperature=temperature, cache=cache)
     
 class EmbeddingFactory(ABC):
     @staticmethod
@@ -92,9 +140,16 @@ class EmbeddingFactory(ABC):
         device: str = "cpu",
         cache_folder: Optional[str] = None,
         encode_kwargs: Optional[dict] = None,
-        model_kwargs: Optional[dict] = None
-    ) -> HuggingFaceEmbeddings:
+        model_kwargs: Optional[dict] = None,
+        backend: Literal["torch", "onnx"] = "torch",
+        quantize: bool = False,
+        threads: Optional[int] = None,
+        batch_size: int = 32,
+        parity_check: bool = False
+    ) -> "HuggingFaceEmbeddings":
         """Provides a HuggingFace embedding model according to given parameters.
+        The 'onnx' backend runs the model with ONNX Runtime (requires sentence-transformers[onnx]), optionally
+        with its int8 quantized export, which is usually several times faster on CPU than the PyTorch model.
 
         Args:
             model_name (str, optional): Name or path of the HuggingFace model. 
@@ -106,13 +161,25 @@ class EmbeddingFactory(ABC):
                 Defaults to None.
             encode_kwargs (dict, optional): Additional kwargs for encoding. 
                 Defaults to None (will use normalize_embeddings).
-            model_kwargs (dict, optional): Additional kwargs for model initialization. 
-                Defaults to None (will use device).
+            model_kwargs (dict, optional): Additional kwargs for model initialization, device, backend, quantize
+                and threads are merged into them. Defaults to None.
+            backend (Literal["torch", "onnx"], optional): Runtime of the model. Defaults to "torch".
+            quantize (bool, optional): Whether to use the int8 quantized ONNX export (ONNX_QUANTIZED_FILE).
+                Defaults to False.
+            threads (int, optional): Number of intra-op threads of the runtime. Defaults to None (runtime default).
+            batch_size (int, optional): Number of texts embedded at once. Defaults to 32.
+            parity_check (bool, optional): Whether to log the cosine drift of a non-torch backend against
+                the reference PyTorch model. Defaults to False.
 
         Raises:
             ValueError: Model name must be a nonempty string!
             ValueError: Device must be a nonempty string!
             ValueError: Cache folder path must be a string if provided!
+            ValueError: Backend must be 'torch' or 'onnx'!
+            ValueError: Backend in model_kwargs must match the backend argument!
+            ValueError: Quantization requires the 'onnx' backend!
+            ValueError: Number of threads must be over 0 if provided!
+            ValueError: Batch size must be over 0!
 
         Returns:
             HuggingFaceEmbeddings: HuggingFace embedding model
@@ -126,10 +193,34 @@ class EmbeddingFactory(ABC):
         if cache_folder is not None and not isinstance(cache_folder, str):
             raise ValueError("Cache folder path must be a string if provided!")
 
-        if model_kwargs is None:
-            model_kwargs = {'device': device}
+        if backend not in ("torch", "onnx"):
+            raise ValueError("Backend must be 'torch' or 'onnx'!")
+
+        if quantize and backend != "onnx":
+            raise ValueError("Quantization requires the 'onnx' backend!")
+
+        if threads is not None and (not isinstance(threads, int) or threads <= 0):
+            raise ValueError("Number of threads must be over 0 if provided!")
+
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise ValueError("Batch size must be over 0!")
+
+        # The backend settings are merged into the supplied model kwargs, so they are never silently dropped.
+        model_kwargs = {'device': device, **(model_kwargs or {})}
+        if model_kwargs.get('backend', backend) != backend:
+            raise ValueError("Backend in model_kwargs must match the backend argument!")
+        if backend == "onnx":
+            onnx_kwargs = {'provider': 'CPUExecutionProvider', **(model_kwargs.get('model_kwargs') or {})}
+            if quantize:
+                onnx_kwargs['file_name'] = ONNX_QUANTIZED_FILE
+            if threads:
+                onnx_kwargs['session_options'] = EmbeddingFactory.__onnx_session_options(threads)
+            model_kwargs.update(backend="onnx", model_kwargs=onnx_kwargs)
         if encode_kwargs is None:
-            encode_kwargs = {'normalize_embeddings': normalize}
+            encode_kwargs = {'normalize_embeddings': normalize, 'batch_size': batch_size}
+        if threads and backend == "torch":
+            import torch
+            torch.set_num_threads(threads)
 
         kwargs = {
             'model_name': model_name,
@@ -140,4 +231,23 @@ class EmbeddingFactory(ABC):
         if cache_folder:
             kwargs['cache_folder'] = cache_folder
 
-        return HuggingFaceEmbeddings(**kwargs)
\ No newline at end of file
+        from langchain_huggingface.embeddings.huggingface import HuggingFaceEmbeddings
+
+        embeddings = HuggingFaceEmbeddings(**kwargs)
+        if parity_check and backend != "torch":
+            reference = EmbeddingFactory.huggingface(model_name, normalize, device, cache_folder, batch_size=batch_size)
+            parity = embedding_parity(embeddings, reference)
+            logger.info(f"Embedding parity of the {backend} backend{' (int8)' if quantize else ''}: "
+                        f"mean cosine {parity['mean_cosine']:.4f}, max drift {parity['max_drift']:.4f}.")
+        return embeddings
+
+    @staticmethod
+    def __onnx_session_options(threads: int):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The 'onnx' backend requires sentence-transformers[onnx] to be installed!") from e
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        return session_options
\ No newline at end of file
@@ -1,8 +1,15 @@
+import re
+
 from langchain_core.language_models.chat_models import BaseChatModel
 
+COLLECTION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
 
 def validate_string(string: str):
     return isinstance(string, str) and len(string.strip()) > 0
 
 def validate_llm(llm: BaseChatModel):
-    return hasattr(llm, 'bind_tools') and hasattr(llm, 'with_structured_output')
\ No newline at end of file
+    return hasattr(llm, 'bind_tools') and hasattr(llm, 'with_structured_output')
+
+def validate_collection_id(collection: str) -> bool:
+    return isinstance(collection, str) and COLLECTION_ID_PATTERN.fullmatch(collection) is not None
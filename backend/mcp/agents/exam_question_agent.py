@@ -1,3 +1,4 @@
+import hashlib
 from dataclasses import dataclass
 from typing import ClassVar
 
@@ -29,5 +30,10 @@ class ExamGenAgent(BaseAgent):
             
         super().__post_init__()
     
+    @property
+    def prompt_version(self) -> str:
+        """Fingerprint of the prompt, changes whenever the prompt is edited."""
+        return hashlib.sha256(self.prompt.encode('utf-8')).hexdigest()[:16]
+
     def _create_agent(self):
         return create_react_agent(self.llm, tools=[], prompt=self.prompt)
\ No newline at end of file
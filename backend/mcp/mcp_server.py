@@ -1,9 +1,15 @@
+import asyncio
+import json
 import logging
+from dataclasses import dataclass
 
+from aiohttp import web
 from dotenv import load_dotenv
-from jsonrpcserver import serve, method, Success, Error
+from jsonrpcserver import async_dispatch, method, Success, Error
 
 from backend.config import Config
+from backend.core.disk_cache import DiskCache
+from backend.core.llm_cache import DiskLLMCache
 from backend.core.models_provider import LLMFactory
 from backend.mcp.agents.exam_question_agent import ExamGenAgent
 from backend.mcp.agents.web_search_agent import WebSearchAgent
@@ -21,11 +27,59 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-web_agent = WebSearchAgent(LLMFactory.openai())
+# Shared with the API process through the cache file.
+llm_cache = DiskLLMCache(Config.LLM_CACHE_PATH, Config.LLM_CACHE_MAX_ENTRIES, Config.LLM_CACHE_TTL) if Config.LLM_CACHE else None
+
+web_agent = WebSearchAgent(LLMFactory.openai(cache=llm_cache))
+# Exam questions are cached by exam_cache, which can be bypassed to generate new questions, so the LLM calls mustn't be.
 exam_agent = ExamGenAgent(LLMFactory.openai())
 
+# Limits the number of tool calls executed at once, the remaining ones wait for a free slot.
+tool_slots = asyncio.Semaphore(Config.MCP_MAX_CONCURRENCY)
+
+search_cache = DiskCache(
+    Config.MCP_CACHE_PATH,
+    namespace="search_web",
+    max_entries=Config.SEARCH_CACHE_MAX_ENTRIES,
+    ttl=Config.SEARCH_CACHE_TTL
+)
+
+exam_cache = DiskCache(
+    Config.MCP_CACHE_PATH,
+    namespace="create_exam_questions",
+    max_entries=Config.EXAM_CACHE_MAX_ENTRIES,
+    ttl=Config.EXAM_CACHE_TTL
+)
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes the query so that trivially different phrasings share a cache entry.
+
+    Args:
+        query (str): search query
+
+    Returns:
+        str: lowercased query with collapsed whitespace and without trailing punctuation
+    """
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+def exam_cache_key(query: str, context: str) -> str:
+    """Builds the cache key of generated exam questions. Questions are reused only for the same topic and context
+    generated by the same model with the same prompt.
+
+    Args:
+        query (str): topic of the questions
+        context (str): context of the topic
+
+    Returns:
+        str: cache key
+    """
+    llm = exam_agent.llm
+    model = getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or type(llm).__name__
+    return json.dumps([query.strip(), context.strip(), model, exam_agent.prompt_version])
+
 @method
-def listTools():
+async def listTools():
     """List available tools for the MCP server.
     This method returns a list of tools that can be used by the MCP server.
     
@@ -56,14 +110,15 @@ def listTools():
             "type": "object",
             "properties": {
                 "query": {"type": "string"},
-                "context": {"type": "string"}
+                "context": {"type": "string"},
+                "fresh": {"type": "boolean", "description": "generate new questions instead of reusing cached ones"}
             },
             "required": ["query"]
         }
     }])
 
 @method
-def callTool(tool: str, args: dict):
+async def callTool(tool: str, args: dict):
     """Execute a call to a specific tool on the MCP server.
     This method allows the MCP server to invoke a specific tool with the provided arguments.
 
@@ -71,18 +126,38 @@ def callTool(tool: str, args: dict):
         tool (str): The name of the tool to call. Supported tools are "search_web" and "create_exam_questions".
         args (dict): A dictionary of arguments to pass to the tool. For "search_web", it should contain a "query" 
         key with the search query string. For "create_exam_questions", it should contain a "query" key with the 
-        topic and an optional "context" key with additional context.
+        topic, an optional "context" key with additional context and an optional "fresh" flag bypassing the cache.
 
     Returns:
         Success: If the tool call is successful, it returns a Success object containing the result of the tool call.
         Error: If the tool is unsupported or if an error occurs during the tool call, it returns an Error object with an error code and message.
     """
     logger.info(f"callTool called with tool={tool!r}, args={args!r}")
+    if tool == "search_web":
+        # Cached answers don't wait for a tool slot.
+        cached = await asyncio.to_thread(search_cache.get, normalize_query(args.get("query", "")))
+        if cached is not None:
+            logger.info(f"callTool returning cached Success(payload of length {len(cached)}), cache: {search_cache.hits} hit(s), {search_cache.misses} miss(es)")
+            return Success(cached)
+
+    if tool == "create_exam_questions" and not args.get("fresh", False):
+        cached = await asyncio.to_thread(exam_cache.get, exam_cache_key(args.get("query", ""), args.get("context", "")))
+        if cached is not None:
+            logger.info(f"callTool returning cached Success(payload of length {len(cached)}), cache: {exam_cache.hits} hit(s), {exam_cache.misses} miss(es)")
+            return Success(cached)
+
+    async with tool_slots:
+        return await _call_tool(tool, args)
+
+
+async def _call_tool(tool: str, args: dict):
     if tool == "search_web":
         # MUST use (message:str)
         q = args.get("query", "")
         try:
-            answer = web_agent.invoke(q)
+            answer = await web_agent.ainvoke(q)
+            if answer and answer != 'No context available for this question.':
+                await asyncio.to_thread(search_cache.put, normalize_query(q), answer)
             logger.info(f"callTool returning Success(payload of length {len(answer)})")
             logger.debug(f"Payload: {answer}")
             return Success(answer)
@@ -94,7 +169,10 @@ def callTool(tool: str, args: dict):
         q = args.get("query", "")
         c = args.get("context", "")
         try:
-            answer = exam_agent.invoke(f"MESSAGE:\n{q}\n\nCONTEXT:{c}\n\n")
+            answer = await exam_agent.ainvoke(f"MESSAGE:\n{q}\n\nCONTEXT:{c}\n\n")
+            if answer:
+                # Fresh questions replace the cached ones.
+                await asyncio.to_thread(exam_cache.put, exam_cache_key(q, c), answer)
             logger.info(f"callTool returning Success(payload of length {len(answer)})")
             logger.debug(f"Payload: {answer}")
             return Success(answer)
@@ -103,7 +181,92 @@ def callTool(tool: str, args: dict):
             return Error(2, f"Creation failed: {e}")
         
     return Error(1, f"Unsupported tool {tool!r}")
-    
 
-logger.info("Web search MCP server listening on http://localhost:4001")
-serve(port=Config.MCP_PORT)
\ No newline at end of file
+
+@method
+async def cacheStats():
+    """Report hit/miss statistics of the MCP server's caches.
+
+    Returns:
+        Success: A dictionary with the size, hits, misses and hit rate of every cache.
+    """
+    return Success({
+        "search_web": await asyncio.to_thread(lambda: search_cache.stats),
+        "create_exam_questions": await asyncio.to_thread(lambda: exam_cache.stats),
+        "llm": await asyncio.to_thread(lambda: llm_cache.stats) if llm_cache else {},
+    })
+
+
+@dataclass
+class PendingCalls:
+    """Number of tool calls admitted by the server and not finished yet."""
+    count: int = 0
+
+
+pending_calls = web.AppKey("pending_calls", PendingCalls)
+
+
+def count_calls(payload: str) -> int:
+    """Counts the JSON-RPC calls in the payload, a batch counts as the number of its calls.
+
+    Args:
+        payload (str): JSON-RPC request or batch of requests
+
+    Returns:
+        int: number of calls, 1 for payloads that are not a valid batch
+    """
+    try:
+        parsed = json.loads(payload)
+    except ValueError:
+        return 1
+    return max(len(parsed), 1) if isinstance(parsed, list) else 1
+
+
+async def handle(request: web.Request) -> web.Response:
+    """Dispatches a JSON-RPC request (or a batch of requests) to the registered methods.
+    Every call of a batch takes a place in the queue. Requests over the queue limit are rejected with 503,
+    so that clients back off and retry, a batch bigger than the whole limit is admitted only when the server is idle.
+
+    Args:
+        request (web.Request): The HTTP request containing the JSON-RPC payload.
+
+    Returns:
+        web.Response: The JSON-RPC response, empty for notifications.
+    """
+    pending = request.app[pending_calls]
+    payload = await request.text()
+    calls = count_calls(payload)
+    if pending.count and pending.count + calls > Config.MCP_MAX_CONCURRENCY + Config.MCP_MAX_QUEUE:
+        logger.warning(f"Request queue is full, rejecting request with {calls} call(s)")
+        return web.Response(status=503, text="MCP server is busy", headers={"Retry-After": "1"})
+
+    pending.count += calls
+    try:
+        response = await async_dispatch(payload)
+    finally:
+        pending.count -= calls
+    return web.Response(text=response, content_type="application/json")
+
+
+async def on_shutdown(app: web.Application):
+    logger.info(f"Shutting down MCP server, {app[pending_calls].count} tool call(s) still in progress")
+
+
+def create_app() -> web.Application:
+    """Creates the MCP server application.
+
+    Returns:
+        web.Application: aiohttp application serving the JSON-RPC endpoint.
+    """
+    app = web.Application()
+    app[pending_calls] = PendingCalls()
+    app.router.add_post("/", handle)
+    app.on_shutdown.append(on_shutdown)
+    return app
+
+
+if __name__ == "__main__":
+    logger.info(f"Web search MCP server listening on http://{Config.MCP_HOST}:{Config.MCP_PORT}")
+    # On SIGINT/SIGTERM the server stops accepting connections and waits up to the shutdown timeout
+    # for the requests in progress to finish.
+    web.run_app(create_app(), host="0.0.0.0", port=Config.MCP_PORT, shutdown_timeout=Config.MCP_SHUTDOWN_TIMEOUT, print=None)
@@ -0,0 +1,52 @@
+import random
+from pathlib import Path
+from typing import List
+
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ra", "su", "ti", "vo", "ze", "pa", "qu", "xi", "do", "fe", "gu", "hy"]
+
+
+def vocabulary(size: int, seed: int = 0) -> List[str]:
+    """Builds a deterministic vocabulary of pseudo-words."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def generate_corpus(path: Path, documents: int, words_per_document: int, seed: int = 0) -> List[Path]:
+    """Writes a synthetic corpus of text documents made of sentences of pseudo-words.
+    Word frequencies are skewed like in natural language, so keyword search behaves realistically.
+
+    Args:
+        path (Path): directory the documents are written to
+        documents (int): number of documents
+        words_per_document (int): number of words of every document
+        seed (int, optional): seed of the generator, the same seed always produces the same corpus. Defaults to 0.
+
+    Returns:
+        List[Path]: paths of the written documents
+    """
+    rng = random.Random(seed)
+    words = vocabulary(5000, seed)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    path.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for num in range(documents):
+        sentences = []
+        remaining = words_per_document
+        while remaining > 0:
+            length = min(remaining, rng.randint(6, 18))
+            sentences.append(" ".join(rng.choices(words, weights, k=length)).capitalize() + ".")
+            remaining -= length
+        document = path / f"document_{num:05d}.txt"
+        document.write_text(" ".join(sentences), encoding="utf-8")
+        paths.append(document)
+    return paths
+
+
+def generate_queries(count: int, seed: int = 0) -> List[str]:
+    """Generates distinct queries made of words of the corpus vocabulary."""
+    rng = random.Random(seed + 1)
+    words = vocabulary(5000, seed)
+    return [f"What is {' '.join(rng.sample(words, 3))}? ({num})" for num in range(count)]
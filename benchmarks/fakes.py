@@ -0,0 +1,102 @@
+import asyncio
+import re
+import time
+import uuid
+from typing import Any, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from backend.api.mcp_client import MCPClient
+
+
+class BenchmarkChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model answering the prompts of the agents with canned responses after a fixed latency.
+    The response is chosen by the agent's system prompt: the task planner gets `tasks` numbered tasks (every other one
+    with an exam question request), context decisions are always 'Yes' and every other prompt gets a short answer
+    derived from the question. When tools are bound, the first tool is called once before answering.
+
+    Attributes:
+        latency (float): seconds every call takes. Default: 0.0
+        tasks (int): number of tasks returned to the task planner. Default: 3
+        tool_names (List[str]): names of the bound tools
+    """
+    latency: float = 0.0
+    tasks: int = 3
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "BenchmarkChatModel":
+        return self.model_copy(update={"tool_names": [getattr(tool, "name", str(tool)) for tool in tools]})
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        def decide(messages: List[Tuple[str, str]]) -> Any:
+            tasks = [int(num) for num in re.findall(r"TASK (\d+):", messages[-1][1])]
+            return schema.model_validate({"decisions": [{"task": num, "sufficient": True} for num in tasks]})
+
+        async def adecide(messages: List[Tuple[str, str]]) -> Any:
+            await asyncio.sleep(self.latency)
+            return decide(messages)
+
+        return RunnableLambda(decide, afunc=adecide)
+
+    def __answer(self, messages: List[BaseMessage]) -> AIMessage:
+        system = next((message.content for message in messages if isinstance(message, SystemMessage)), "")
+        question = next((message.content for message in reversed(messages) if isinstance(message, HumanMessage)), "")
+        if self.tool_names and not isinstance(messages[-1], ToolMessage):
+            return AIMessage("", tool_calls=[{"name": self.tool_names[0], "args": {"question": question}, "id": uuid.uuid4().hex}])
+
+        if "task analyzer" in system:
+            lines = []
+            for num in range(1, self.tasks + 1):
+                lines.append(f"MAIN {num}: explain topic {num} of {question}")
+                if num % 2:
+                    lines.append(f"QUES {num}: exam questions about topic {num} of {question}")
+            content = "\n".join(lines)
+        elif "decision-making" in system:
+            content = "Yes"
+        else:
+            content = f"Answer based on the given context: {question[:200]}"
+
+        message = AIMessage(content)
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": len(content) // 4, "total_tokens": input_tokens + len(content) // 4}
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self.__answer(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self.__answer(messages))])
+
+
+class BenchmarkMCPClient(MCPClient):
+    """Offline MCP client returning canned web search results and exam questions after a fixed latency per request."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__("http://benchmark.invalid")
+        self.latency = latency
+
+    @staticmethod
+    def __result(name: str, args: dict) -> str:
+        if name == "search_web":
+            return f"Web search results for: {args['query']}"
+        return f"1. Exam question about {args['query']}\n2. Another exam question about {args['query']}"
+
+    async def call_tool(self, name: str, args, timeout: Optional[float] = None) -> str:
+        await asyncio.sleep(self.latency)
+        return self.__result(name, args)
+
+    async def call_tools(self, calls: List[Tuple[str, dict]], timeout: Optional[float] = None) -> List[str]:
+        if not calls:
+            return []
+        await asyncio.sleep(self.latency)
+        return [self.__result(name, args) for name, args in calls]
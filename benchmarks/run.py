@@ -0,0 +1,249 @@
+"""Offline benchmark suite of the assistant's components.
+
+Runs without OpenAI, Tavily or a real corpus: documents are generated, embeddings come from a deterministic fake model
+and all LLM and MCP calls are answered by deterministic fakes with a configurable latency. Results are written as JSON,
+so runs of different revisions can be compared.
+
+Usage:
+    python -m benchmarks.run --documents 200 --queries 500 --output benchmark_results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import tempfile
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.tracers.context import register_configure_hook
+
+from backend.api.agents.RAG.ann_index import IndexConfig
+from backend.api.agents.RAG.collection_registry import CollectionRegistry
+from backend.api.agents.RAG.vector_store import VectorStoreProvider
+from backend.api.agents.assistant.assistant_agent import AssistantAgent
+from backend.api.agents.assistant.task_planner import TaskPlanner
+from backend.config import Config
+from benchmarks.corpus import generate_corpus, generate_queries
+from benchmarks.fakes import BenchmarkChatModel, BenchmarkMCPClient
+
+logger = logging.getLogger(__name__)
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Callback handler measuring how long every node of the invoked graph ran. Routers run as part of the node they
+    leave, so e.g. the context decisions are included in the 'rag' and 'web_search' nodes. Agents invoked by a node
+    start runs of their own, which are part of the duration of that node."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.__root: Optional[UUID] = None
+        self.__started: Dict[UUID, tuple] = {}
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any):
+        if parent_run_id is None and self.__root is None:
+            self.__root = run_id
+        elif parent_run_id == self.__root:
+            self.__started[run_id] = (kwargs.get("name") or "unknown", time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        if run_id in self.__started:
+            name, start = self.__started.pop(run_id)
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+
+node_timer_var: ContextVar[Optional[NodeTimer]] = ContextVar("node_timer", default=None)
+register_configure_hook(node_timer_var, inheritable=True)
+
+
+def summarize(samples: List[float], scale: float = 1000.0) -> Dict[str, float]:
+    """Summary statistics of the samples, in milliseconds by default."""
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * scale
+
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered) * scale,
+        "min": ordered[0] * scale,
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1] * scale,
+    }
+
+
+def bench_ingestion(root: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    documents_path = root / "documents"
+    start = time.perf_counter()
+    generate_corpus(documents_path, args.documents, args.words, args.seed)
+    generation = time.perf_counter() - start
+
+    provider = VectorStoreProvider(
+        DeterministicFakeEmbedding(size=args.dimension),
+        documents_path=documents_path,
+        vectorstore_path=root / "vector_db",
+        embedding_cache=False,
+        workers=args.workers,
+        index_config=IndexConfig(index_type=args.index_type, flat_threshold=Config.VECTOR_INDEX_FLAT_THRESHOLD),
+        hybrid=args.hybrid,
+        query_cache_size=0,
+    )
+    start = time.perf_counter()
+    provider.refresh()
+    return {
+        "documents": args.documents,
+        "words_per_document": args.words,
+        "corpus_generation_seconds": generation,
+        "build_seconds": time.perf_counter() - start,
+        **{f"stats_{key}": value for key, value in provider.build_stats.items()},
+    }
+
+
+def bench_retrieval(root: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    provider = VectorStoreProvider(
+        DeterministicFakeEmbedding(size=args.dimension),
+        documents_path=root / "documents",
+        vectorstore_path=root / "vector_db",
+        embedding_cache=False,
+        workers=args.workers,
+        index_config=IndexConfig(index_type=args.index_type, flat_threshold=Config.VECTOR_INDEX_FLAT_THRESHOLD),
+        hybrid=args.hybrid,
+        query_cache_size=0,
+        auto_refresh=False,
+    )
+    start = time.perf_counter()
+    retriever = provider.retriever
+    load = time.perf_counter() - start
+
+    queries = generate_queries(args.queries, args.seed)
+    retriever.invoke(queries[0])
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.invoke(query)
+        samples.append(time.perf_counter() - start)
+    return {"index_load_ms": load * 1000, "latency_ms": summarize(samples)}
+
+
+def bench_task_parsing(args: argparse.Namespace) -> Dict[str, Any]:
+    lines = []
+    for num in range(1, args.tasks + 1):
+        lines.append(f"MAIN {num}: explain topic {num} in detail")
+        if num % 2:
+            lines.append(f"QUES {num}: exam questions about topic {num}")
+    output = "\n".join(lines)
+
+    samples = []
+    for _ in range(args.parse_iterations):
+        start = time.perf_counter()
+        TaskPlanner.result_to_dict(output)
+        samples.append(time.perf_counter() - start)
+    return {"tasks": args.tasks, "latency_us": summarize(samples, scale=1e6)}
+
+
+async def bench_assistant(root: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    embedding_model = DeterministicFakeEmbedding(size=args.dimension)
+    collections = CollectionRegistry(
+        embedding_model,
+        documents_path=root / "documents",
+        vectorstore_path=root / "vector_db",
+        provider_kwargs={
+            "embedding_cache": False,
+            "workers": args.workers,
+            "index_config": IndexConfig(index_type=args.index_type, flat_threshold=Config.VECTOR_INDEX_FLAT_THRESHOLD),
+            "hybrid": args.hybrid,
+            "auto_refresh": False,
+        },
+    )
+    assistant = AssistantAgent(
+        BenchmarkChatModel(latency=args.llm_latency, tasks=args.tasks),
+        embedding_model,
+        collections=collections,
+        mcp_client=BenchmarkMCPClient(args.tool_latency),
+        rag_mode=args.rag_mode,
+        context_decision_mode=args.context_decision_mode,
+    )
+
+    questions = generate_queries(args.invocations + 1, args.seed + 1)
+    await assistant.ainvoke(questions[0])
+    latencies = []
+    nodes: Dict[str, List[float]] = {}
+    for question in questions[1:]:
+        timer = NodeTimer()
+        token = node_timer_var.set(timer)
+        try:
+            start = time.perf_counter()
+            await assistant.ainvoke(question)
+            latencies.append(time.perf_counter() - start)
+        finally:
+            node_timer_var.reset(token)
+        for node, duration in timer.durations.items():
+            nodes.setdefault(node, []).append(duration)
+    return {
+        "invocations": args.invocations,
+        "latency_ms": summarize(latencies),
+        "nodes_ms": {node: summarize(samples) for node, samples in nodes.items()},
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+    }
+    with tempfile.TemporaryDirectory(prefix="assistant-benchmark-") as tmp:
+        root = Path(tmp)
+        logger.info("Benchmarking ingestion...")
+        results["ingestion"] = bench_ingestion(root, args)
+        logger.info("Benchmarking retrieval...")
+        results["retrieval"] = bench_retrieval(root, args)
+        logger.info("Benchmarking task parsing...")
+        results["task_parsing"] = bench_task_parsing(args)
+        logger.info("Benchmarking the assistant...")
+        results["assistant"] = asyncio.run(bench_assistant(root, args))
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark suite of the assistant's components.")
+    parser.add_argument("--documents", type=int, default=100, help="number of generated documents")
+    parser.add_argument("--words", type=int, default=1000, help="number of words per generated document")
+    parser.add_argument("--dimension", type=int, default=384, help="dimension of the fake embeddings")
+    parser.add_argument("--queries", type=int, default=200, help="number of timed retrieval queries")
+    parser.add_argument("--parse-iterations", type=int, default=10000, help="number of timed task planner outputs parsed")
+    parser.add_argument("--invocations", type=int, default=10, help="number of timed assistant invocations")
+    parser.add_argument("--tasks", type=int, default=3, help="number of tasks planned for every question")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds every fake LLM call takes")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="seconds every fake MCP request takes")
+    parser.add_argument("--index-type", default=Config.VECTOR_INDEX_TYPE, help="FAISS index type")
+    parser.add_argument("--hybrid", action=argparse.BooleanOptionalAction, default=Config.HYBRID_SEARCH, help="fuse dense and BM25 search")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes loading and splitting documents")
+    parser.add_argument("--rag-mode", default=Config.RAG_MODE, choices=["agent", "direct"])
+    parser.add_argument("--context-decision-mode", default=Config.CONTEXT_DECISION_MODE, choices=["per_task", "batched"])
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated corpus and queries")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"), help="path of the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.setLevel(logging.INFO)
+    args = parse_args(argv)
+    results = run(args)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+    logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ st.write("This is a simple web application to interact with the Assistant.")
 st.write("You can upload your own decuments that will later get processed via RAG to best answer your question.")
 st.write("You can ask questions and get answers from the Assistant. If the assistant won't find anything relevant to your question in the uploaded documents, it will try to answer your question using the internet search.")
 
+collection = st.text_input("Collection (e.g. course code):", value="default")
+
 st.subheader("Upload your files here:")
 uploaded_files = st.file_uploader("Choose a file", accept_multiple_files=True, type=['pdf', 'txt', 'html', 'md', 'docx', 'pptx'])
 submit_files_button = st.button("Submit Files")
@@ -26,7 +28,8 @@ if submit_files_button:
             try:
                 response = requests.post(
                     f"http://{API_HOST}:{API_PORT}/upload", 
-                    files={"file": uploaded_file}
+                    files={"file": uploaded_file},
+                    params={"collection": collection}
                 )
                 # return response.json()
                 st.success(response)
@@ -37,14 +40,63 @@ if submit_files_button:
 
 st.subheader("Ask a question:")
 question = st.text_input("Enter your question here:")
+fresh = st.checkbox("Generate new exam questions", value=False)
 submit_question_button = st.button("Submit Question")
+STAGES = {
+    "web_search": "Searching the web for missing context...",
+    "question_generation": "Generating exam questions...",
+}
+
+
+def read_events(response):
+    """Yields the JSON events of a Server-Sent Events response as they arrive."""
+    for line in response.iter_lines(decode_unicode=True):
+        if line and line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
+
+
 if submit_question_button:
     if question:
-        # Send the question to the backend API
-        response = requests.post(f"http://{API_HOST}:{API_PORT}/query", json={"query": question})
+        # Send the question to the backend API and render the answer while it is being generated
+        response = requests.post(
+            f"http://{API_HOST}:{API_PORT}/query/stream",
+            json={"query": question, "collection": collection, "fresh": fresh},
+            stream=True
+        )
         if response.status_code == 200:
-            answer = response.json().get("answer")
-            st.write("Answer:", answer)
+            st.write("Answer:")
+            status = st.info("Planning tasks...")
+            sections = {}
+            summaries = {}
+            for event in read_events(response):
+                if event["type"] == "tasks":
+                    status.info("Looking for context in your documents...")
+                    for num, task in event["tasks"].items():
+                        st.markdown(f"**{task}**")
+                        sections[str(num)] = st.empty()
+                elif event["type"] == "status":
+                    status.info(STAGES.get(event["stage"], "Working..."))
+                elif event["type"] == "token":
+                    num = str(event["task"])
+                    summaries[num] = summaries.get(num, "") + event["content"]
+                    if num in sections:
+                        sections[num].markdown(summaries[num] + "▌")
+                elif event["type"] == "task":
+                    num = str(event["task"])
+                    if num in sections:
+                        with sections[num].container():
+                            st.markdown(event["summary"])
+                            if event["questions"]:
+                                st.markdown("Generated questions:")
+                                st.markdown(event["questions"])
+                elif event["type"] == "result":
+                    status.empty()
+                    if not sections:
+                        # Answers reused from the cache of similar questions arrive at once
+                        st.markdown(event["answer"])
+                elif event["type"] == "error":
+                    status.empty()
+                    st.error("Error: " + event["detail"])
         else:
             st.error("Error: " + response.text)
     else:
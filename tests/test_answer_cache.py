@@ -0,0 +1,15 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.api.answer_cache import SemanticAnswerCache
+
+
+def test_answer_of_outdated_index_version_is_dropped():
+    cache = SemanticAnswerCache(DeterministicFakeEmbedding(size=16), threshold=0.99, ttl=None)
+    cache.put("What is osmosis?", "biology", "v1", "old answer")
+    assert cache.get("What is osmosis?", "biology", "v2") is None
+
+    cache.put("What is diffusion?", "biology", "v2", "fresh answer")
+    cache.put("What is osmosis?", "biology", "v1", "late answer")
+
+    assert cache.get("What is osmosis?", "biology", "v2") is None
+    assert cache.get("What is diffusion?", "biology", "v2")[0] == "fresh answer"
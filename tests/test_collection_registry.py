@@ -0,0 +1,24 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.api.agents.RAG.collection_registry import CollectionRegistry
+from backend.core.validation_methods import validate_collection_id
+
+
+def test_collection_id_rejects_trailing_newline():
+    assert validate_collection_id("biology")
+    assert not validate_collection_id("biology\n")
+
+
+def test_exists_does_not_create_the_collection(tmp_path):
+    registry = CollectionRegistry(
+        DeterministicFakeEmbedding(size=16),
+        documents_path=tmp_path / "uploads",
+        vectorstore_path=tmp_path / "vector_db",
+    )
+
+    assert not registry.exists("biology")
+    assert not (tmp_path / "uploads" / "biology").exists()
+    assert registry.loaded == []
+
+    (tmp_path / "uploads" / "biology").mkdir(parents=True)
+    assert registry.exists("biology")
@@ -0,0 +1,30 @@
+import threading
+import time
+from typing import List
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.api.agents.RAG.embedding_cache import CachedEmbeddings
+
+
+class SlowEmbedding(DeterministicFakeEmbedding):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if "slow" in texts[0]:
+            time.sleep(0.5)
+        return super().embed_documents(texts)
+
+
+def test_model_call_does_not_block_other_callers(tmp_path):
+    cache = CachedEmbeddings(SlowEmbedding(size=16), tmp_path / "embedding_cache.sqlite")
+    cache.embed_documents(["cached chunk"])
+
+    slow = threading.Thread(target=cache.embed_documents, args=(["slow chunk"],))
+    slow.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    cache.embed_documents(["cached chunk"])
+    elapsed = time.perf_counter() - start
+    slow.join()
+
+    assert elapsed < 0.3
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from backend.api.ingestion_jobs import IngestionQueue, JobStatus
+
+
+class SlowProvider:
+    def __init__(self):
+        self.finished = 0
+
+    def refresh(self, progress=None) -> bool:
+        time.sleep(0.2)
+        self.finished += 1
+        return True
+
+
+class Registry:
+    def __init__(self):
+        self.provider = SlowProvider()
+
+    def get(self, collection: str) -> SlowProvider:
+        return self.provider
+
+
+def test_stop_waits_for_running_job():
+    registry = Registry()
+
+    async def run():
+        queue = IngestionQueue(registry)
+        queue.start()
+        running = queue.submit("default")
+        await asyncio.sleep(0.05)
+        queued = queue.submit("biology")
+        await queue.stop()
+        return running, queued
+
+    running, queued = asyncio.run(run())
+
+    assert running.status == JobStatus.SUCCEEDED
+    assert queued.status == JobStatus.QUEUED
+    assert registry.provider.finished == 1
+
+
+def test_stop_idle_queue():
+    async def run():
+        queue = IngestionQueue(Registry())
+        queue.start()
+        await queue.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 1))
@@ -0,0 +1,19 @@
+import warnings
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from backend.core.llm_cache import DiskLLMCache
+
+
+def test_cache_hit_is_silent(tmp_path):
+    cache = DiskLLMCache(tmp_path / "llm_cache.sqlite")
+    cache.update("prompt", "llm", [ChatGeneration(message=AIMessage("answer", usage_metadata={
+        "input_tokens": 3, "output_tokens": 1, "total_tokens": 4}))])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        generations = cache.lookup("prompt", "llm")
+
+    assert generations[0].message.content == "answer"
+    assert generations[0].message.usage_metadata is None
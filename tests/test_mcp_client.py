@@ -0,0 +1,60 @@
+import asyncio
+
+from backend.api.mcp_client import MCPClient
+
+
+class FlakyServerClient(MCPClient):
+    """Answers batches with an error for the first call, single calls always succeed."""
+    def __init__(self):
+        super().__init__("http://mcp.invalid", retries=0)
+        self.posted = []
+
+    async def _post(self, payload, timeout=None):
+        self.posted.append(payload)
+        if isinstance(payload, dict):
+            return {"jsonrpc": "2.0", "id": payload["id"], "result": f"retried {payload['params']['args']['query']}"}
+        return [
+            {"jsonrpc": "2.0", "id": request["id"], "error": {"code": 2, "message": "Search failed"}} if position == 0
+            else {"jsonrpc": "2.0", "id": request["id"], "result": f"batched {request['params']['args']['query']}"}
+            for position, request in enumerate(payload)
+        ]
+
+
+def test_call_tools_retries_only_failed_calls():
+    client = FlakyServerClient()
+    results = asyncio.run(client.call_tools([("search_web", {"query": q}) for q in ("a", "b", "c")]))
+
+    assert results == ["retried a", "batched b", "batched c"]
+    assert len(client.posted) == 2
+    assert client.posted[1]["params"]["args"] == {"query": "a"}
+
+
+def test_each_event_loop_gets_its_own_session():
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    async def handle(request):
+        payload = await request.json()
+        return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "result": "ok"})
+
+    sessions = []
+
+    async def call(client: MCPClient, server: TestServer):
+        client.url = str(server.make_url("/"))
+        assert await client.call_tool("search_web", {"query": "a"}) == "ok"
+        sessions.extend(client._MCPClient__sessions.values())
+        await client.close()
+
+    async def run(client: MCPClient):
+        app = web.Application()
+        app.router.add_post("/", handle)
+        async with TestServer(app) as server:
+            await call(client, server)
+
+    client = MCPClient("http://mcp.invalid", retries=0)
+    asyncio.run(run(client))
+    asyncio.run(run(client))
+
+    assert len(sessions) == 2 and sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
+    assert not client._MCPClient__sessions
@@ -0,0 +1,34 @@
+import sys
+import types
+
+import pytest
+
+from backend.core.models_provider import EmbeddingFactory, ONNX_QUANTIZED_FILE
+
+
+class FakeHuggingFaceEmbeddings:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def fake_huggingface(monkeypatch):
+    module = types.ModuleType("langchain_huggingface.embeddings.huggingface")
+    module.HuggingFaceEmbeddings = FakeHuggingFaceEmbeddings
+    monkeypatch.setitem(sys.modules, "langchain_huggingface.embeddings.huggingface", module)
+
+
+def test_backend_settings_are_merged_into_model_kwargs(fake_huggingface):
+    embeddings = EmbeddingFactory.huggingface(
+        model_kwargs={"trust_remote_code": True}, backend="onnx", quantize=True
+    )
+
+    model_kwargs = embeddings.kwargs["model_kwargs"]
+    assert model_kwargs["trust_remote_code"] is True
+    assert model_kwargs["backend"] == "onnx"
+    assert model_kwargs["model_kwargs"]["file_name"] == ONNX_QUANTIZED_FILE
+
+
+def test_conflicting_backend_is_rejected(fake_huggingface):
+    with pytest.raises(ValueError):
+        EmbeddingFactory.huggingface(model_kwargs={"backend": "torch"}, backend="onnx")
@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+import time
+from typing import List
+
+import faiss
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.api.agents.RAG.ann_index import IndexConfig, index_kind
+from backend.api.agents.RAG.vector_store import VectorStoreProvider, file_hash
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: int = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def build(tmp_path, vectorstore_dir: str) -> VectorStoreProvider:
+    provider = VectorStoreProvider(
+        embedding_model=DeterministicFakeEmbedding(size=16),
+        chunk_size=300,
+        chunk_overlap=50,
+        documents_path=tmp_path / "documents",
+        vectorstore_path=tmp_path / vectorstore_dir,
+        embedding_cache_path=tmp_path / "embedding_cache.sqlite",
+        workers=1,
+        hybrid=False,
+        query_cache_size=16,
+    )
+    provider.refresh()
+    return provider
+
+
+def test_embedding_cache_stats_logged_with_query_cache(tmp_path, caplog):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    (documents / "notes.txt").write_text("Photosynthesis converts light into chemical energy. " * 20)
+
+    with caplog.at_level(logging.INFO, logger="backend.api.agents.RAG.vector_store"):
+        build(tmp_path, "first")
+        build(tmp_path, "second")
+
+    stats = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Embedding cache:")]
+    assert len(stats) == 2
+    assert stats[0].startswith("Embedding cache: 0 hit(s)")
+    assert stats[1].endswith(" 0 miss(es).")
+    assert not stats[1].startswith("Embedding cache: 0 hit(s)")
+
+
+def test_documents_are_split_in_worker_processes(tmp_path):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    for i in range(3):
+        (documents / f"notes_{i}.txt").write_text(f"Lecture {i} covers the citric acid cycle. " * 20)
+
+    provider = VectorStoreProvider(
+        embedding_model=DeterministicFakeEmbedding(size=16),
+        chunk_size=300,
+        chunk_overlap=50,
+        documents_path=documents,
+        vectorstore_path=tmp_path / "vector_db",
+        workers=2,
+        hybrid=False,
+    )
+    provider.refresh()
+
+    assert provider.build_stats["documents"] == 3
+    assert provider.build_stats["failed"] == 0
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf"])
+def test_approximate_index_deletion_does_not_reembed(tmp_path, index_type):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    for i in range(40):
+        (documents / f"notes_{i}.txt").write_text(f"Lecture {i} covers topic number {i} in detail. " * 15)
+
+    embedding_model = CountingEmbedding(size=16)
+    provider = VectorStoreProvider(
+        embedding_model=embedding_model,
+        chunk_size=300,
+        chunk_overlap=50,
+        documents_path=documents,
+        vectorstore_path=tmp_path / "vector_db",
+        embedding_cache=False,
+        workers=1,
+        hybrid=False,
+        index_config=IndexConfig(index_type=index_type, flat_threshold=0, nlist=2),
+    )
+    provider.refresh()
+    assert index_kind(faiss.read_index(str(tmp_path / "vector_db" / "index.faiss"))) == index_type
+
+    (documents / "notes_0.txt").unlink()
+    embedding_model.embedded = 0
+    provider.refresh()
+
+    assert embedding_model.embedded == 0
+    assert index_kind(faiss.read_index(str(tmp_path / "vector_db" / "index.faiss"))) == index_type
+    assert provider.retriever.invoke("topic number 5")
+
+
+def test_retriever_is_kept_while_documents_are_reindexed(tmp_path):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    (documents / "notes.txt").write_text("Mitochondria produce most of the chemical energy of the cell. " * 20)
+
+    started = threading.Event()
+
+    class SlowEmbedding(DeterministicFakeEmbedding):
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            started.set()
+            time.sleep(0.3)
+            return super().embed_documents(texts)
+
+    provider = VectorStoreProvider(
+        embedding_model=SlowEmbedding(size=16),
+        chunk_size=300,
+        chunk_overlap=50,
+        documents_path=documents,
+        vectorstore_path=tmp_path / "vector_db",
+        workers=1,
+        hybrid=False,
+    )
+    assert provider.retriever is not None
+
+    (documents / "cells.txt").write_text("Ribosomes synthesize proteins. " * 20)
+    started.clear()
+    rebuild = threading.Thread(target=lambda: provider.retriever)
+    rebuild.start()
+    started.wait(5)
+    assert provider._VectorStoreProvider__retriever is not None
+    rebuild.join()
+    assert provider.retriever is not None
+
+
+class CrashingLoader:
+    """Loader killing the worker process, like a segfault in a native parser."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        os._exit(1)
+
+
+def test_crashed_worker_fails_only_its_document(tmp_path):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    (documents / "broken.crash").write_text("not a document")
+    for i in range(10):
+        (documents / f"notes_{i}.txt").write_text(f"Lecture {i} covers the Krebs cycle. " * 20)
+
+    provider = VectorStoreProvider(
+        embedding_model=DeterministicFakeEmbedding(size=16),
+        chunk_size=300,
+        chunk_overlap=50,
+        documents_path=documents,
+        vectorstore_path=tmp_path / "vector_db",
+        workers=2,
+        hybrid=False,
+        auto_refresh=False,
+    )
+    provider._VectorStoreProvider__loaders[".crash"] = CrashingLoader
+    provider.refresh()
+
+    assert provider.build_stats["documents"] == 10
+    assert provider.build_stats["failed"] == 1
+
+
+def test_replaced_document_is_not_a_duplicate(tmp_path):
+    documents = tmp_path / "documents"
+    documents.mkdir()
+    notes = documents / "notes.txt"
+    notes.write_text("Enzymes lower the activation energy of reactions. " * 20)
+    provider = build(tmp_path, "vector_db")
+    digest = file_hash(notes)
+    assert provider.find_document(digest) == notes
+
+    notes.write_text("Replaced content that isn't ingested yet. " * 20)
+    os.utime(notes, (time.time() + 10, time.time() + 10))
+
+    assert provider.find_document(digest) is None